@@ -0,0 +1,41 @@
+import argparse
+import json
+import sys
+from modules.analysis import *
+
+
+def run_analysis(lines, output, depth, time_limit, workers):
+    """
+    Write one JSON result per input position as soon as it is searched and print summary to stderr
+    """
+    positions = 0
+    solved = 0
+    tested = 0
+    for result in analyze_lines(lines, depth, time_limit, workers):
+        output.write(json.dumps(result, allow_nan=False) + '\n')
+        output.flush()
+        positions += 1
+        if 'solved' in result:
+            tested += 1
+            solved += result['solved']
+
+    summary = "{} positions".format(positions)
+    if tested:
+        summary += ", best move found in {}/{}".format(solved, tested)
+    print(summary, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Analyze FEN/EPD positions headless, one JSON line per position")
+    parser.add_argument('input', nargs='?', default='-', help="file with one FEN or EPD position per line, "
+                                                              "- reads stdin")
+    parser.add_argument('--output', help="file to write results to, stdout by default")
+    parser.add_argument('--depth', type=int, help="search depth (4 if neither depth nor time is given)")
+    parser.add_argument('--time', type=float, help="seconds per position")
+    parser.add_argument('--workers', type=int, default=1, help="number of processes searching positions")
+    args = parser.parse_args()
+
+    depth = args.depth if args.depth or args.time else 4
+    lines = sys.stdin if args.input == '-' else open(args.input)
+    output = open(args.output, 'w') if args.output else sys.stdout
+    run_analysis(lines, output, depth, args.time, args.workers)
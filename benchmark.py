@@ -0,0 +1,298 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from modules.perft import *
+from modules.bitboard import BitBoard
+from modules.parallel import ParallelSearch
+
+# Board backends compared by benchmark
+backends = {'array': Board, 'bitboard': BitBoard}
+
+# Fixed positions used by search benchmarks
+positions = {
+    'start': start_fen,
+    'italian': "r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    'queens_gambit': "rnbqk2r/ppp1bppp/4pn2/3p2B1/2PP4/2N5/PP2PPPP/R2QKBNR w KQkq - 3 5",
+    'open_center': "rn2kb1r/ppp1pppp/5n2/q4b2/3P4/2N2N2/PPP2PPP/R1BQKB1R w KQkq - 3 6",
+    'scholars_mate': "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4",
+    'kiwipete': "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    'rook_endgame': "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+}
+
+# Tactical positions (Win At Chess 001-010) with expected best move in coordinate notation
+tactical_positions = [
+    ('WAC.001', "2rr3k/pp3pp1/1nnqbN1p/3pN3/2pP4/2P3Q1/PPB4P/R4RK1 w - - 0 1", 'g3g6'),
+    ('WAC.002', "8/7p/5k2/5p2/p1p2P2/Pr1pPK2/1P1R3P/8 b - - 0 1", 'b3b2'),
+    ('WAC.003', "5rk1/1ppb3p/p1pb4/6q1/3P1p1r/2P1R2P/PP1BQ1P1/5RKN w - - 0 1", 'e3g3'),
+    ('WAC.004', "r1bq2rk/pp3pbp/2p1p1pQ/7P/3P4/2PB1N2/PP3PPR/2KR4 w - - 0 1", 'h6h7'),
+    ('WAC.005', "5k2/6pp/p1qN4/1p1p4/3P4/2PKP2Q/PP3r2/3R4 b - - 0 1", 'c6c4'),
+    ('WAC.006', "7k/p7/1R5K/6r1/6p1/6P1/8/8 w - - 0 1", 'b6b7'),
+    ('WAC.007', "rnbqkb1r/pppp1ppp/8/4P3/6n1/7P/PPPNPPP1/R1BQKBNR b KQkq - 0 1", 'g4e3'),
+    ('WAC.008', "r4q1k/p2bR1rp/2p2Q1N/5p2/5p2/2P5/PP3PPP/R5K1 w - - 0 1", 'e7f7'),
+    ('WAC.009', "3q1rk1/p4pp1/2pb3p/3p4/6Pr/1PNQ4/P1PB1PP1/4RRK1 b - - 0 1", 'd6h2'),
+    ('WAC.010', "2br2k1/2q3rn/p2NppQ1/2p1P3/Pp5R/4P3/1P3PPP/3R2K1 w - - 0 1", 'h4h7'),
+]
+
+
+def board_benchmark(depth, search_depth):
+    """
+    Compare move generation speed (legal move tree walk from start position) and
+    negamax time of every board backend, print nodes/sec and gain against array board
+    """
+    results = {}
+    for name, backend in backends.items():
+        board = backend()
+        start = time.perf_counter()
+        nodes = perft(board, depth)
+        walk_time = time.perf_counter() - start
+
+        board = backend()
+        transposition_table.clear()
+        start = time.perf_counter()
+        negamax(board, search_depth, -math.inf, math.inf)
+        search_time = time.perf_counter() - start
+
+        results[name] = (nodes, walk_time, search_time)
+        print("{:<10} nodes {:>8}  {:>10.0f} nodes/sec  negamax depth {} {:.3f}s".format(
+            name, nodes, nodes / walk_time, search_depth, search_time))
+
+    base_nodes, base_walk, base_search = results['array']
+    for name, (nodes, walk_time, search_time) in results.items():
+        if name != 'array':
+            print("{} vs array: move generation x{:.2f}, negamax x{:.2f}".format(
+                name, base_walk / walk_time, base_search / search_time))
+
+
+def ordering_benchmark(depth):
+    """
+    Search every benchmark position to fixed depth with and without move ordering and print nodes
+    and share of cutoffs caused by first searched move
+    """
+    for name, fen in positions.items():
+        for ordering in (False, True):
+            board = Board(fen)
+            transposition_table.clear()
+            search = Search(ordering=ordering)
+            start = time.perf_counter()
+            iterative_deepening(board, max_depth=depth, search=search)
+            elapsed = time.perf_counter() - start
+            print("{:<14} ordering {:<5} nodes {:>8}  first move cutoffs {:>6.1%}  {:.2f}s".format(
+                name, str(ordering), search.nodes, search.cutoff_rate(), elapsed))
+
+
+def tactical_benchmark(depth):
+    """
+    Solve tactical positions with quiescence search at given depth and with plain search one ply deeper,
+    print nodes, time and number of positions where expected best move is found
+    """
+    for quiescence, search_depth in ((True, depth), (False, depth + 1)):
+        solved = 0
+        total_nodes = 0
+        total_time = 0.0
+        for name, fen, expected in tactical_positions:
+            board = Board(fen)
+            transposition_table.clear()
+            search = Search(quiescence=quiescence)
+            score, move, completed = iterative_deepening(board, max_depth=search_depth, search=search)
+            elapsed = time.perf_counter() - search.start
+            move = move_name(*board.decode(move)) if move else None
+            solved += move == expected
+            total_nodes += search.nodes
+            total_time += elapsed
+            print("{:<8} quiescence {:<5} depth {:>2}  nodes {:>8}  {:>8.3f}s  best {}  expected {}".format(
+                name, str(quiescence), search_depth, search.nodes, elapsed, move, expected))
+        print("quiescence {:<5} depth {:>2}  solved {}/{}  nodes {}  {:.3f}s".format(
+            str(quiescence), search_depth, solved, len(tactical_positions), total_nodes, total_time))
+
+
+# Selective search settings compared by benchmark as name: (null move pruning, late move reductions)
+selective_configs = {'full width': (False, False), 'null move': (True, False),
+                     'reductions': (False, True), 'both': (True, True)}
+
+
+def selective_benchmark(depth):
+    """
+    Search benchmark and tactical positions to fixed depth with every selective search setting and print
+    nodes, summed time to depth and number of tactical positions solved
+    """
+    for name, (null_move, reductions) in selective_configs.items():
+        nodes = 0
+        time_to_depth = [0.0] * depth
+        for fen in positions.values():
+            board = Board(fen)
+            transposition_table.clear()
+            search = Search(null_move=null_move, reductions=reductions)
+            iterative_deepening(board, max_depth=depth, search=search)
+            nodes += search.nodes
+            for current, score, iteration_nodes, seconds in search.iterations:
+                time_to_depth[current - 1] += seconds
+
+        solved = 0
+        for tactical, fen, expected in tactical_positions:
+            board = Board(fen)
+            transposition_table.clear()
+            search = Search(null_move=null_move, reductions=reductions)
+            score, move, completed = iterative_deepening(board, max_depth=depth, search=search)
+            solved += bool(move) and move_name(*board.decode(move)) == expected
+
+        print("{:<11} nodes {:>9}  time to depth {}  tactical solved {}/{}".format(
+            name, nodes, [round(seconds, 3) for seconds in time_to_depth], solved, len(tactical_positions)))
+
+
+def search_position(fen, depth):
+    """
+    Search position to fixed depth with empty transposition table and return dict of results
+    """
+    board = Board(fen)
+    transposition_table.clear()
+    search = Search()
+    score, move, completed = iterative_deepening(board, max_depth=depth, search=search)
+    elapsed = time.perf_counter() - search.start
+    mate = mate_moves(score, principal_variation(board, search.table, completed))
+    return {
+        'fen': fen,
+        'depth': completed,
+        'nodes': search.nodes,
+        'seconds': round(elapsed, 4),
+        'nps': round(search.nodes / elapsed) if elapsed else 0,
+        'time_to_depth': [round(seconds, 4) for depth, score, nodes, seconds in search.iterations],
+        'evaluations': search.evaluations,
+        'best_move': move_name(*board.decode(move)) if move else None,
+        'score': int(score) if mate is None else None,
+        'mate': mate,
+    }
+
+
+def search_benchmark(depth, output=None, baseline=None, threshold=10.0):
+    """
+    Search every benchmark position to fixed depth and print nodes, nodes/sec, time to depth,
+    evaluation calls and best move. results are written as JSON to output file. if baseline file is given
+    returns False when total nodes/sec or total time is more than threshold percent worse than baseline
+    """
+    results = {'depth': depth, 'positions': {}}
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen in positions.items():
+        result = search_position(fen, depth)
+        results['positions'][name] = result
+        total_nodes += result['nodes']
+        total_time += result['seconds']
+        print("{:<14} depth {:>2}  nodes {:>8}  {:>7} nodes/sec  {:>8.3f}s  evals {:>8}  best {}  score {}".format(
+            name, result['depth'], result['nodes'], result['nps'], result['seconds'], result['evaluations'],
+            result['best_move'], result['score'] if result['mate'] is None else "mate {}".format(result['mate'])))
+        print("{:<14} time to depth {}".format('', result['time_to_depth']))
+
+    results['total'] = {'nodes': total_nodes, 'seconds': round(total_time, 4),
+                        'nps': round(total_nodes / total_time) if total_time else 0}
+    print("total          nodes {}  {:.3f}s  {} nodes/sec".format(total_nodes, total_time, results['total']['nps']))
+
+    if output:
+        with open(output, 'w') as file:
+            json.dump(results, file, indent=2, allow_nan=False)
+
+    if baseline:
+        with open(baseline) as file:
+            base = json.load(file)['total']
+        nps_change = (results['total']['nps'] - base['nps']) / base['nps'] * 100
+        time_change = (total_time - base['seconds']) / base['seconds'] * 100
+        print("against baseline: nodes/sec {:+.1f}%, time {:+.1f}%".format(nps_change, time_change))
+        if nps_change < -threshold or time_change > threshold:
+            print("performance regression above {}%".format(threshold))
+            return False
+
+    return True
+
+
+def parallel_benchmark(depth, worker_counts):
+    """
+    Search every benchmark position to fixed depth with root splitting parallel search for every
+    worker count and print total nodes/sec and time to depth compared with one worker
+    """
+    base = None
+    for workers in worker_counts:
+        parallel = ParallelSearch(workers)
+        nodes = 0
+        elapsed = 0.0
+        time_to_depth = [0.0] * depth
+        for name, fen in positions.items():
+            board = Board(fen)
+            start = time.perf_counter()
+            parallel.search(board, depth)
+            elapsed += time.perf_counter() - start
+            nodes += parallel.nodes
+            for current, score, iteration_nodes, seconds in parallel.iterations:
+                time_to_depth[current - 1] += seconds
+        parallel.close()
+
+        if base is None:
+            base = elapsed
+        print("workers {:>2}  nodes {:>8}  {:>8.0f} nodes/sec  {:>8.3f}s  speedup x{:.2f}  time to depth {}".format(
+            workers, nodes, nodes / elapsed, elapsed, base / elapsed, [round(seconds, 3) for seconds in time_to_depth]))
+
+
+def memory_benchmark(depth):
+    """
+    Print bytes used by piece objects and move buffer of start position, peak memory of one move generation
+    and of search to fixed depth on benchmark positions with bytes search leaves allocated
+    """
+    board = Board()
+    pieces = [piece for row in board.array for piece in row if piece]
+    piece_bytes = 0
+    for piece in pieces:
+        piece_bytes += sys.getsizeof(piece)
+        if hasattr(piece, '__dict__'):
+            piece_bytes += sys.getsizeof(piece.__dict__)
+    moves = generate_moves(board, board.turn)
+    print("pieces {}  {} bytes ({:.0f} per piece)  start moves {}  {} bytes".format(
+        len(pieces), piece_bytes, piece_bytes / len(pieces), len(moves), sys.getsizeof(moves)))
+
+    tracemalloc.start()
+    generate_moves(board, board.turn)
+    print("generate_moves peak {} bytes".format(tracemalloc.get_traced_memory()[1]))
+    tracemalloc.stop()
+
+    for name, fen in positions.items():
+        board = Board(fen)
+        transposition_table.clear()
+        search = Search()
+        tracemalloc.start()
+        iterative_deepening(board, max_depth=depth, search=search)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print("{:<14} depth {}  nodes {:>8}  peak {:>8} bytes  retained {:>8} bytes".format(
+            name, depth, search.nodes, peak, retained))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Headless benchmarks for chess engine")
+    parser.add_argument('--depth', type=int, default=3, help="depth of legal move tree walk")
+    parser.add_argument('--search-depth', type=int, default=2, help="depth of negamax search")
+    parser.add_argument('--ordering', action='store_true', help="measure move ordering instead of board backends")
+    parser.add_argument('--search', action='store_true', help="run search benchmark on fixed positions")
+    parser.add_argument('--tactical', action='store_true', help="compare quiescence search with plain search "
+                                                                "one ply deeper on tactical positions")
+    parser.add_argument('--selective', action='store_true', help="compare null move pruning and late move "
+                                                                 "reductions with full width search")
+    parser.add_argument('--parallel', type=int, nargs='*', help="run parallel search scaling benchmark for "
+                                                                "given worker counts (1 2 4 8 by default)")
+    parser.add_argument('--memory', action='store_true', help="measure memory of pieces, moves and search")
+    parser.add_argument('--output', help="write search benchmark results to JSON file")
+    parser.add_argument('--baseline', help="JSON file of earlier search benchmark to compare with")
+    parser.add_argument('--threshold', type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args()
+    if args.memory:
+        memory_benchmark(args.search_depth)
+    elif args.parallel is not None:
+        parallel_benchmark(args.search_depth, args.parallel or [1, 2, 4, 8])
+    elif args.selective:
+        selective_benchmark(args.search_depth)
+    elif args.tactical:
+        tactical_benchmark(args.search_depth)
+    elif args.search:
+        sys.exit(0 if search_benchmark(args.search_depth, args.output, args.baseline, args.threshold) else 1)
+    elif args.ordering:
+        ordering_benchmark(args.search_depth)
+    else:
+        board_benchmark(args.depth, args.search_depth)
@@ -0,0 +1,53 @@
+import argparse
+import time
+from modules.book import *
+
+
+def run_build(games, output, plies):
+    """
+    Build Polyglot book from game log and print number of entries, size and games skipped for illegal moves
+    """
+    start = time.perf_counter()
+    entries, skipped = build_book(read_games(games), output, plies)
+    print("{} entries  {} bytes  {} games skipped  {:.3f}s".format(entries, entries * entry_format.size, skipped,
+                                                                   time.perf_counter() - start))
+
+
+def run_probe(path, fen, moves):
+    """
+    Print book moves with weights for position given as FEN and/or moves from start position
+    """
+    board = Board(fen)
+    board.play(moves)
+    book = OpeningBook(path)
+    start = time.perf_counter()
+    book_moves = book.moves(board)
+    elapsed = time.perf_counter() - start
+    total = sum(weight for move, weight in book_moves)
+    for move, weight in sorted(book_moves, key=lambda item: -item[1]):
+        print("{} {:>6} {:>6.1%}".format(move_name(*board.decode(move)), weight, weight / total))
+    print("{} book moves  {} entries in book  lookup {:.3f}ms".format(len(book_moves), book.count, elapsed * 1000))
+    book.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build and probe Polyglot-format opening book")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="build book from game log, one game per line in coordinate "
+                                              "notation optionally followed by result")
+    build.add_argument('games', help="game log file")
+    build.add_argument('output', nargs='?', default="book.bin", help="book file to write")
+    build.add_argument('--plies', type=int, default=16, help="number of moves of every game put in book")
+    probe = commands.add_parser('probe', help="print book moves of position")
+    probe.add_argument('book', nargs='?', default="book.bin", help="book file")
+    probe.add_argument('--fen', help="position to look up, start position by default")
+    probe.add_argument('moves', nargs='*', help="moves made from position in coordinate notation")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        run_build(args.games, args.output, args.plies)
+    else:
+        try:
+            run_probe(args.book, args.fen, args.moves)
+        except ValueError as error:
+            parser.error(str(error))
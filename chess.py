@@ -1,5 +1,19 @@
+import argparse
+import os
 import sys
+import pygame
 from modules.AI import *
+from modules.worker import *
+from modules.book import *
+from modules.sprites import *
+
+parser = argparse.ArgumentParser(description="Play chess against AI")
+parser.add_argument('--square-size', type=int, default=default_squaresize,
+                    help="size of board square in pixels, images are scaled to it once at startup")
+args = parser.parse_args()
+
+# Size of square block
+squaresize = args.square_size
 
 # Initialize pygame first
 pygame.init()
@@ -10,12 +24,13 @@ screen = pygame.display.set_mode((8 * squaresize, 8 * squaresize))
 # Set caption
 pygame.display.set_caption("Chess with AI")
 
-# Load fonts
-gameover_font = pygame.font.Font("assets/FreeSansBold.ttf", 32)
+# Load fonts, sizes follow square size
+gameover_font = pygame.font.Font("assets/FreeSansBold.ttf", squaresize * 32 // default_squaresize)
+info_font = pygame.font.Font("assets/FreeSansBold.ttf", squaresize * 16 // default_squaresize)
 
-# Load and draw chessboard
-bg = pygame.image.load("assets/chessboard.png").convert()
-bg = pygame.transform.scale(bg, (8 * squaresize, 8 * squaresize))
+# Load sprite atlas once, chessboard and pieces are cut from it and scaled to square size
+load_atlas()
+bg = sprite('board', 8 * squaresize, 8 * squaresize, alpha=False)
 
 # Create Board object
 board = Board()
@@ -26,6 +41,19 @@ pieces = [piece for row in board.array for piece in row if piece]
 # To maintain frame per second
 clock = pygame.time.Clock()
 
+# Frames per second while ai thinks, waiting for player input blocks until next event
+fps = 30
+frame_time = 1000 // fps
+
+# Image key and highlight of piece drawn on every square at last frame, squares missing here are redrawn
+drawn = {}
+
+# Text surfaces and their rectangles shown over board at last frame
+shown = []
+
+# Indicator shown while ai searches its move
+thinking_text = info_font.render("AI thinking...", True, (255, 255, 255), (0, 0, 0))
+
 # 1 indicates player turn 0 indicates ai turn
 player = 1
 AI = 0
@@ -33,8 +61,30 @@ AI = 0
 # Give turn randomly
 turn = random.randint(0, 1)
 
-# This will use to highlight piece when selected
+# Side to move is part of position hash
+board.set_turn('w' if turn == player else 'b')
+
+# Seconds ai can spend on searching a move
+ai_time_limit = 2.0
+
+# Background search of ai, None while no search is running
+worker = None
+
+# Search running on player's time, ponder_move is the predicted player move it searches the reply to
+# or None if current position is searched to fill transposition table
+ponder = None
+ponder_move = None
+
+# Principal variation of last ai search, its second move is the predicted player move
+ai_pv = []
+
+# Opening book built with book.py, ai plays from it while position is in book
+book_path = "book.bin"
+book = OpeningBook(book_path) if os.path.exists(book_path) else None
+
+# This will use to highlight piece when selected, pieces hold no drawing state
 selected = False
+selected_piece = None
 
 
 def get_inputs():
@@ -42,13 +92,42 @@ def get_inputs():
     Get inputs from user to make moves.function returns coordinates of mouse click position
     """
     while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return False
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                pos_col, pos_row = pygame.mouse.get_pos()
-                pos_col, pos_row = math.floor(pos_col / squaresize), math.floor(pos_row / squaresize)
-                return pos_col, pos_row
+        # Sleep until next event so pondering search gets the cpu
+        event = pygame.event.wait()
+        if event.type == pygame.QUIT:
+            return False
+        if event.type == pygame.VIDEOEXPOSE:
+            # Window was uncovered, draw whole board again
+            drawn.clear()
+            render()
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            pos_col, pos_row = event.pos
+            pos_col, pos_row = math.floor(pos_col / squaresize), math.floor(pos_row / squaresize)
+            return pos_col, pos_row
+
+
+def start_pondering(pv):
+    """
+    Start search on player's time and return (worker, predicted move). if principal variation of last ai search
+    predicts a legal player move the position after it is searched, otherwise current position is searched
+    so transposition table is filled for the ai search that follows
+    """
+    predicted = None
+    if len(pv) > 1:
+        try:
+            move = board.parse_move(pv[1])
+            predicted = pv[1]
+        except ValueError:
+            pass
+
+    if predicted is not None:
+        board.make_encoded_move(move)
+        ponder_worker = SearchWorker(board)
+        board.unmake_move()
+    else:
+        ponder_worker = SearchWorker(board)
+    ponder_worker.start()
+    return ponder_worker, predicted
 
 
 def select_piece(row, col, color):
@@ -60,36 +139,98 @@ def select_piece(row, col, color):
             return piece
 
 
-def game_over(winner):
+def game_result():
     """
-    Print name of winner on screen at checkmate
+    Return text shown when game has ended in current position, None while side to move has a legal move.
+    player plays white pieces
     """
-    gameover_text = gameover_font.render("{} wins".format(winner), True, (255, 255, 255))
-    screen.blit(gameover_text, (0, 0))
+    color = board.turn
+    if board.has_legal_move(color):
+        return None
+    if not board.is_checked(color):
+        return "stalemate"
+    return "player wins" if color == 'b' else "AI wins"
 
 
-# Will become true if either of them put other in checkmate
-ai_win = False
-player_win = False
+def wait_frame():
+    """
+    Wait until next frame is due while handling window events, returns False if window is closed.
+    main thread sleeps while waiting so search thread gets the cpu
+    """
+    event = pygame.event.wait(frame_time)
+    while event.type != pygame.NOEVENT:
+        if event.type == pygame.QUIT:
+            return False
+        if event.type == pygame.VIDEOEXPOSE:
+            drawn.clear()
+        event = pygame.event.poll()
+    clock.tick(fps)
+    return True
+
+
+def render(texts=()):
+    """
+    Redraw only squares whose piece or highlight changed since last frame, and squares under given
+    (surface, position) texts when they differ from texts of last frame. only redrawn parts of display are updated
+    """
+    global shown
+    dirty = set()
+    for row in range(8):
+        for col in range(8):
+            piece = board.array[row][col]
+            state = (piece.img, selected and piece is selected_piece) if piece else None
+            if (row, col) not in drawn or drawn[row, col] != state:
+                drawn[row, col] = state
+                dirty.add((row, col))
+
+    # Squares covered by text that appears or disappears
+    texts = [(surface, surface.get_rect(topleft=position)) for surface, position in texts]
+    if [surface for surface, rect in texts] != [surface for surface, rect in shown]:
+        for surface, rect in shown + texts:
+            for row in range(rect.top // squaresize, (rect.bottom - 1) // squaresize + 1):
+                for col in range(rect.left // squaresize, (rect.right - 1) // squaresize + 1):
+                    dirty.add((row, col))
+
+    rects = []
+    for row, col in dirty:
+        rect = pygame.Rect(col * squaresize, row * squaresize, squaresize, squaresize)
+        screen.blit(bg, rect, rect)
+        piece = board.array[row][col]
+        if piece is not None:
+            draw_piece(screen, piece, squaresize, selected and piece is selected_piece)
+        rects.append(rect)
+
+    # Texts are drawn again on top of redrawn squares
+    for surface, rect in texts:
+        if rect.collidelist(rects) != -1:
+            screen.blit(surface, rect)
+    shown = texts
+
+    if rects:
+        pygame.display.update(rects)
+
+
+# Text shown when game ends by checkmate or stalemate, decided from position after every move
+game_over = None
 
 # Run the game
 run = True
 
 while run:
-    # Draw screen
-    screen.blit(bg, (0, 0))
-
-    # Draw all pieces by using draw method of Piece class
-    for piece in pieces:
-        piece.draw(screen)
-
-    # This will update display
-    pygame.display.update()
+    # Draw changes of last move or selection, indicator is shown while ai searches
+    if worker is not None:
+        render([(thinking_text, (0, 8 * squaresize - thinking_text.get_height()))])
+    else:
+        render()
 
     # Check turn
     if turn == player:
+        if ponder is None:
+            ponder, ponder_move = start_pondering(ai_pv)
+
         pos = get_inputs()
         if not pos:
+            ponder.cancel()
             sys.exit()
 
         elif not selected:
@@ -101,7 +242,6 @@ while run:
 
                 # Highlight piece when selected
                 selected = True
-                selected_piece.highlight = True
 
                 # Check for castling possibility
                 left_castle, right_castle = board.castling('w')
@@ -118,94 +258,86 @@ while run:
 
         elif selected:
             col, row = pos
-            selected_piece.highlight = False
+            # Unhighlight piece, it gets selected again if move is not valid
+            selected = False
             if (row, col) in moves:
-                # Make castle move if valid
-                if (row, col) in castle_moves:
-                    castle = board.castling_move(selected_piece, row, col, 'w')
-                    if castle:
-                        # Change turn after move and unhighlight piece
-                        turn = AI
-                        selected = False
-
-                else:  # Make normal move
-                    # Store initial position in case if we have to reverse move
-                    old_row = selected_piece.row
-                    old_col = selected_piece.col
-                    dest = board.array[row][col]
-                    promotion = board.move_piece(selected_piece, row, col)
-                    if type(selected_piece) == King or type(selected_piece) == Rook:
-                        selected_piece.moved = True
-                    if dest:
-                        # Remove opponent piece if captured
-                        pieces.remove(dest)
-                    if promotion:
-                        # Respawn Queen object in case of pawn promotion
-                        pieces.append(promotion[0])
-                        pieces.remove(promotion[1])
-
-                    # Check if move puts player in check
-                    check = board.is_checked('w')
-                    if check:
-                        # Reverse move if it puts player i check
-                        selected = False
-                        board.move_piece(selected_piece, old_row, old_col)
-                        board.array[row][col] = dest
-                        if type(selected_piece) == King or type(selected_piece) == Rook:
-                            selected_piece.moved = False
-                        if dest:
-                            pieces.append(dest)
-                        if promotion:
-                            pieces.append(promotion[1])
-                            pieces.remove(promotion[0])
-
+                # Make move, castling and pawn promotion are handled by board
+                player_move = move_name(selected_piece, row, col)
+                board.make_move(selected_piece, row, col)
+
+                # Check if move puts player in check
+                if board.is_checked('w'):
+                    # Reverse move if it puts player in check
+                    board.unmake_move()
+
+                else:
+                    # Change turn after making move, game ends if move leaves ai without legal move
+                    turn = AI
+                    game_over = game_result()
+                    if game_over is not None:
+                        ponder.cancel()
+                        run = False
+
+                    # On ponder hit search goes on with time counted from its start, so ai answers
+                    # at once if player took longer than ai time limit. on miss its work is dropped
+                    elif ponder_move is not None and ponder_move == player_move:
+                        worker = ponder
+                        worker.set_time_limit(ai_time_limit)
                     else:
-                        # Change turn and unhighlight selected piece after making move
-                        selected = False
-                        turn = AI
+                        ponder.cancel()
+                    ponder = None
 
-            else:
-                # Keep player in turn until move complete
-                # and unhighlight piece if no valid move is selected by player
-                selected = False
+                # Update pieces for drawing after capture or promotion
+                pieces = [piece for row in board.array for piece in row if piece]
+
+            # Player stays in turn if no valid move is selected
 
     elif turn == AI:
-        # Get coordinates to move piece based on minimax score
-        score, ai_piece, (row, col) = minimax(board, 2, -math.inf, math.inf, True)
+        # Known opening moves are played from book without searching
+        book_move = book.choose(board) if book is not None and worker is None else None
+        if book_move is not None:
+            board.make_encoded_move(book_move)
+            pieces = [piece for row in board.array for piece in row if piece]
+            ai_pv = []
+            turn = player
+            game_over = game_result()
+            run = game_over is None
+            continue
+
+        # Search runs on background worker so window keeps responding while ai thinks
+        if worker is None:
+            worker = SearchWorker(board, time_limit=ai_time_limit)
+            worker.start()
+
+        result = worker.poll()
+        if result is None:
+            if not wait_frame():
+                # Abort search right away when window is closed
+                worker.cancel()
+                sys.exit()
 
-        # Ai in checkmate and player wins
-        if score == -math.inf:
-            player_win = True
-            run = False
         else:
-            dest = board.array[row][col]
-            promotion = board.move_piece(ai_piece, row, col)
-            if type(ai_piece) == King or type(ai_piece) == Rook:
-                ai_piece.moved = True
-            if dest:
-                # Remove opponent piece if captured
-                pieces.remove(dest)
-            if promotion:
-                # Respawn Queen object in case of pawn promotion
-                pieces.append(promotion[0])
-                pieces.remove(promotion[1])
-
-        # Change turn after move completion
-        turn = player
-
-        # Player in checkmate Ai wins
-        if score == math.inf:
-            ai_win = True
-            run = False
-
-    # Draw pieces on board
-    for piece in pieces:
-        piece.draw(screen)
-    if player_win:
-        game_over('player')
-    elif ai_win:
-        game_over('AI')
-    pygame.display.update()
+            ai_pv = worker.pv
+            worker = None
+            score, move, depth = result
+
+            # Game is not over so ai has a legal move, search score only predicts the game
+            if not move:
+                raise RuntimeError("search returned no move in {}".format(board.to_fen()))
+            board.make_encoded_move(move)
+
+            # Update pieces for drawing after capture or promotion
+            pieces = [piece for row in board.array for piece in row if piece]
+
+            # Change turn after move completion
+            turn = player
+
+            # Checkmate or stalemate is decided from position on board
+            game_over = game_result()
+            run = game_over is None
+
+# Show final position with winner or stalemate
+render([(gameover_font.render(game_over, True, (255, 255, 255)), (0, 0))])
 
 pygame.time.wait(5000)
 pygame.quit()
@@ -1,308 +1,571 @@
 from modules.board import *
+from modules.transposition import *
+from modules.tablebase import *
+from array import array
 import math
 import random
+import time
+
+# Transposition table shared by searches, size in MB
+tt_size_mb = 16
+transposition_table = TranspositionTable(tt_size_mb)
+
+# Endgame tables found in tablebase directory, see tablebase.py to generate them
+endgame_tablebase = Tablebase()
+
+# Number of nodes searched between two checks of the clock
+check_interval = 64
+
+# Deepest ply for which killer moves are kept
+max_ply = 128
+
+# History scores are halved once one of them reaches this limit, so quiet moves stay ordered below
+# killer moves (80000) and captures (100000)
+history_limit = 60000
+
+# Piece ranks used to order captures by most valuable victim, least valuable attacker
+piece_ranks = {Pawn: 1, Knight: 2, Bishop: 3, Rook: 4, Queen: 5, King: 6}
+
+# Depth reduction of null move search and smallest depth where null move is tried
+null_move_reduction = 2
+null_move_depth = 3
+
+# Late move reductions: quiet moves searched after this many moves at nodes of at least lmr_depth
+# are searched one ply shallower first
+lmr_moves = 3
+lmr_depth = 3
+
+# Root aspiration window: first window is score of previous iteration +/- aspiration_window,
+# widened four times on every fail low/high and opened fully once it reaches aspiration_limit
+aspiration_window = 50
+aspiration_limit = 1000
+aspiration_depth = 3
+
+# Safety margin of delta pruning in quiescence search, capture is skipped if winning the captured
+# piece plus margin can not reach alpha
+delta_margin = 200
+
+
+class SearchAborted(Exception):
+    """
+    Raised inside negamax when time or node budget of search runs out
+    """
+
+
+class Search:
+    """
+    Search stores state shared by all nodes of one search: transposition table, time and node budget,
+    node count, move ordering tables and principal variation of last completed iteration.
+    """
+
+    def __init__(self, table=None, time_limit=None, node_limit=None, ordering=True, quiescence=True,
+                 null_move=True, reductions=True, tablebase=None):
+        self.table = table if table is not None else transposition_table
+        self.tablebase = tablebase if tablebase is not None else endgame_tablebase
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self.node_limit = node_limit
+        self.nodes = 0
+
+        # Capture search at horizon, null move pruning and late move reductions
+        self.quiescence = quiescence
+        self.null_move = null_move
+        self.reductions = reductions
+
+        # Move ordering: two killer moves per ply and history score per piece and destination square
+        self.ordering = ordering
+        self.killers = [[0, 0] for ply in range(max_ply)]
+        self.history = {(color, piece_type): [0] * 64 for color in ('w', 'b') for piece_type in piece_ranks}
+
+        # Beta cutoffs and how many of them came from first searched move, full window re-searches
+        # of null window and aspiration window searches
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.researches = 0
+
+        # Positions answered by endgame tablebase
+        self.tablebase_hits = 0
+
+        # Leaf evaluations and (depth, score, nodes, seconds) of every completed iteration
+        self.evaluations = 0
+        self.iterations = []
+        self.start = time.perf_counter()
+
+        # Search can only be aborted by budget once at least one depth is completed,
+        # stop() aborts it at any point
+        self.abortable = False
+        self.stopped = False
+
+        # Principal variation as {position hash: encoded move}
+        self.pv = {}
+
+    def cutoff_rate(self):
+        """
+        Return share of beta cutoffs caused by first searched move
+        """
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def age_history(self):
+        """
+        Halve every history score, older cutoffs count less and scores stay below history_limit
+        """
+        for scores in self.history.values():
+            for square in range(64):
+                scores[square] >>= 1
+
+    def stop(self):
+        """
+        Abort search from another thread, search ends at next visited node
+        """
+        self.stopped = True
+
+    def count_node(self):
+        """
+        Count visited node and abort search if it is stopped or budget is used up
+        """
+        self.nodes += 1
+        if self.stopped:
+            raise SearchAborted
+        if self.abortable:
+            if self.node_limit is not None and self.nodes >= self.node_limit:
+                raise SearchAborted
+            if self.deadline is not None and self.nodes % check_interval == 0 and time.perf_counter() >= self.deadline:
+                raise SearchAborted
 
 
 def score_value(board, color):
     """
-    Give score to each piece positive to own piece and negative to opponent piece.
-    some important moves affect score based board condition.
-    return score after correcting it for all pieces and piece moves.
+    Return score of position from point of view of given color. material and piece-square score is kept
+    up to date by board on every move, castling rights and king safety are added once per call.
     """
-    score = 0
-    ai_moves = board.opponent_moves(color)
-    player_moves = board.opponent_moves('w')
-
-    for i in range(8):
-        for j in range(8):
-            piece = board.array[i][j]
-            if piece is not None and piece.color == color:
-                left_castle, right_castle = board.castling('b')
-                if right_castle:
-                    score += 50
-                if type(piece) == King:
-                    score += 1000
-                    if (piece.row, piece.col) in player_moves:
-                        score -= 200
-                elif type(piece) == Queen:
-                    score += 1100
-                    if piece.row == 0 or piece.row == 1:
-                        score -= 100
-                elif type(piece) == Rook:
-                    score += 500
-                    if board.black_rook_left.row == 0 and board.black_rook_left.col == 0:
-                        score += 40
-                elif type(piece) == Bishop:
-                    score += 300
-                    if piece.row == 0 or piece.row == 1:
-                        score -= 40
-                elif type(piece) == Knight:
-                    score += 350
-                    if (piece.row, piece.col) in [(0, 1), (0, 6)]:
-                        score -= 50
-                elif type(piece) == Pawn:
-                    score += 70
-                    if (piece.row, piece.col) in [(0, 2), (0, 3), (0, 4)]:
-                        score -= 20
-
-            if piece is not None and piece.color != color:
-                if type(piece) == King:
-                    score -= 1000
-                    if (piece.row, piece.col) in ai_moves:
-                        score += 200
-                elif type(piece) == Queen:
-                    score -= 1000
-                elif type(piece) == Rook:
-                    score -= 500
-                elif type(piece) == Bishop:
-                    score -= 300
-                elif type(piece) == Knight:
-                    score -= 300
-                elif type(piece) == Pawn:
-                    score -= 50
+    score = board.score
+
+    # Castling rights still available, bits 1 and 2 belong to white, 4 and 8 to black
+    rights = board.castle_rights()
+    score += castle_bonus * ((rights & 1) + (rights >> 1 & 1) - (rights >> 2 & 1) - (rights >> 3 & 1))
+
+    # King safety
+    if board.is_checked('w'):
+        score -= check_penalty
+    if board.is_checked('b'):
+        score += check_penalty
 
+    if color == 'b':
+        return -score
     return score
 
 
-def minimax(board, depth, alpha, beta, maximizingPlayer):
+def generate_moves(board, color):
+    """
+    Return array('H') of every move of given color packed into 16-bit integers, castling moves and
+    promotions to every piece type included
+    """
+    moves = array('H')
+    squares = board.array
+    left_castle, right_castle = board.castling(color)
+    for piece, move_list in board.possible_moves(color):
+        origin = (piece.row * 8 + piece.col) << 6
+        pawn = type(piece) == Pawn
+        if type(piece) == King:
+            move_list = move_list + left_castle + right_castle
+        for r, c in move_list:
+            move = origin | r * 8 + c
+            if squares[r][c] is not None or (pawn and c != piece.col):
+                move |= capture_flag
+            if pawn and (r == 0 or r == 7):
+                # Queen first, underpromotions after
+                for index in (3, 0, 2, 1):
+                    moves.append(move | promotion_flag | index << 12)
+            else:
+                moves.append(move)
+
+    return moves
+
+
+def order_moves(board, moves, search, ply, first):
+    """
+    Sort moves so the ones most likely to cause a cutoff are searched first:
+    table/principal variation move, captures by most valuable victim/least valuable attacker,
+    promotions, two killer moves of this ply and then quiet moves by history score.
+    returns list of (order, move)
+    """
+    killers = search.killers[ply]
+    history = search.history
+    squares = board.array
+    scored = []
+    for move in moves:
+        piece = squares[move >> 9 & 7][move >> 6 & 7]
+        if move == first:
+            order = 1000000
+        elif move & capture_flag:
+            # En passant captures have no piece on target square
+            victim = squares[move >> 3 & 7][move & 7]
+            order = 100000 + piece_ranks[type(victim) if victim else Pawn] * 10 - piece_ranks[type(piece)]
+            if move & promotion_flag:
+                order += move >> 12 & 3
+        elif move & promotion_flag:
+            order = 95000 + (move >> 12 & 3)
+        elif move == killers[0]:
+            order = 90000
+        elif move == killers[1]:
+            order = 80000
+        else:
+            order = history[piece.color, type(piece)][move & 63]
+        scored.append((order, move))
+
+    scored.sort(reverse=True)
+    return scored
+
+
+def generate_captures(board, color):
+    """
+    Return list of (order, move) for captures and Queen promotions of given color,
+    sorted by most valuable victim/least valuable attacker
+    """
+    captures = []
+    squares = board.array
+    for piece, move_list in board.possible_captures(color):
+        origin = (piece.row * 8 + piece.col) << 6
+        rank = piece_ranks[type(piece)]
+        pawn = type(piece) == Pawn
+        for r, c in move_list:
+            victim = squares[r][c]
+            move = origin | r * 8 + c
+            if pawn and (r == 0 or r == 7):
+                move |= promotion_flag | 3 << 12
+            if victim is not None:
+                captures.append((piece_ranks[type(victim)] * 10 - rank, move | capture_flag))
+            elif pawn and c != piece.col:
+                # En passant capture
+                captures.append((piece_ranks[Pawn] * 10 - rank, move | capture_flag))
+            elif pawn and (r == 0 or r == 7):
+                captures.append((piece_ranks[Pawn] * 10 - rank, move))
+
+    captures.sort(reverse=True)
+    return captures
+
+
+def has_pieces(board, color):
+    """
+    Check if given color has any piece other than king and pawns, null move is unsafe without them
+    because positions with only king and pawns are often zugzwang
+    """
+    for line in board.array:
+        for piece in line:
+            if piece is not None and piece.color == color and type(piece) != Pawn and type(piece) != King:
+                return True
+    return False
+
+
+def quiescence(board, alpha, beta, search):
     """
-    Minimax function will recursively look through all possible board state
-    and pick one where maximizing player get highest score
-    depth indicates number of recursions
-    alpha,beta value used to break loop which iterates over all possible moves by each piece of each side
+    Search only captures and promotions below horizon of negamax until position is quiet, so leaf scores
+    are not taken in the middle of an exchange. side to move can stand pat on static score,
+    captures that can not bring score back to alpha even with delta margin are pruned.
+    score is from point of view of side to move
     """
+    search.count_node()
+    search.evaluations += 1
+    color = board.turn
+    value = score_value(board, color)
+
+    # Stand pat
+    if value >= beta:
+        return value
+    alpha = max(alpha, value)
+
+    stand_pat = value
+    for order, move in generate_captures(board, color):
+        # Delta pruning, promotions are never pruned
+        victim = board.array[move >> 3 & 7][move & 7]
+        if victim is not None and not move & promotion_flag:
+            if stand_pat + piece_values[type(victim)] + delta_margin <= alpha:
+                continue
+
+        board.make_encoded_move(move)
+        if board.is_checked(color):
+            board.unmake_move()
+            continue
+        score = -quiescence(board, -beta, -alpha, search)
+        board.unmake_move()
+
+        value = max(value, score)
+        alpha = max(alpha, value)
+        if alpha >= beta:
+            break
+
+    return value
+
+
+def negamax(board, depth, alpha, beta, search=None, ply=0):
+    """
+    Negamax function will recursively look through all possible board states and pick move with
+    highest score for side to move, score of a position is negated score of its opponent.
+    returns (score, best move encoded as integer), move is 0 if no move was searched.
+    depth indicates number of recursions, ply is distance from root of search.
+    first move is searched with full alpha,beta window and others with null window around alpha
+    (principal variation search), move beating alpha is searched again with full window.
+    positions already searched deep enough are answered from transposition table
+    """
+    if search is None:
+        search = Search()
+
+    # Endgames covered by tablebase get exact score, root still needs a move so it is searched.
+    # distance to mate of tablebase is counted from this node, ply moves it to distance from root
+    if ply > 0 and board.piece_count <= max_pieces:
+        score = search.tablebase.probe(board)
+        if score is not None:
+            search.count_node()
+            search.tablebase_hits += 1
+            if score > 0:
+                score -= ply
+            elif score < 0:
+                score += ply
+            return score, 0
+
+    # Positions at horizon are resolved by capture search, which counts its own nodes
+    if depth == 0 and search.quiescence:
+        return quiescence(board, alpha, beta, search), 0
+    search.count_node()
+
     if depth == 0:
-        score = score_value(board, 'b')
-        return score, None, None
-
-    if maximizingPlayer:  # Ai side with black piece color is maximizing player
-
-        # Set initial score value
-        value = -math.inf
-
-        # Get all valid moves available to ai
-        valid_moves = board.opponent_moves('b')
-
-        # Pick move randomly, this move will get changed based on minimax score
-        best_row, best_col = random.choice(valid_moves)
-
-        # Get moves by pieces
-        ai_moves = board.possible_moves('b')
-
-        # Initialize piece with None,it will changed based on minimax score
-        best_piece = None
-
-        # Iterate over all possible moves by each piece
-        for piece, move_list in ai_moves:
-
-            # Check for castling possibility
-            castle_moves = []
-            left_castle, right_castle = board.castling('b')
-            if type(piece) == King:
-                if left_castle:
-                    for move in left_castle:
-                        castle_moves.append(move)
-                if right_castle:
-                    for move in right_castle:
-                        castle_moves.append(move)
-
-            # Add castling moves to piece move_list
-            moves = move_list + castle_moves
-
-            # Castling implementation is complex, we have to look if castling is allowed at given position
-            for r, c in moves:
-                # preserve initial piece and coordinates
-                old_row = piece.row
-                old_col = piece.col
-                dest = board.array[r][c]
-
-                # Make castling move if possible at given coordinates
-                if (r, c) in castle_moves:
-                    castle = board.castling_move(piece, r, c, 'b')
-                    if castle:
-                        score, Piece, move = minimax(board, depth - 1, alpha, beta, False)
-
-                        # Reverse the move to get back to initial board state
-                        if [(r, c)] == left_castle:
-                            board.move_piece(piece, old_row, old_col)
-                            board.move_piece(board.black_rook_left, r, c - 2)
-                            board.black_king.moved = False
-                            board.black_rook_left.moved = False
-                        if [(r, c)] == right_castle:
-                            board.move_piece(piece, old_row, old_col)
-                            board.move_piece(board.black_rook_right, r, c + 1)
-                            board.black_king.moved = False
-                            board.black_rook_right.moved = False
-
-                        # Update the score
-                        if score > value:
-                            value = score
-                            best_row = r
-                            best_col = c
-                            best_move = (best_row, best_col)
-                            best_piece = piece
-                        alpha = max(alpha, value)
-                        if alpha >= beta:
-                            return value, piece, best_move
-
-                else:
-                    # Check for pawn promotion
-                    promotion = board.move_piece(piece, r, c)
-                    if type(piece) == King or type(piece) == Rook:
-                        check_castle = piece.moved
-                        piece.moved = True
-
-                    # Check if move put ai in check
-                    check = board.is_checked('b')
-                    if check:
-                        # Reverse the move if move put piece in check
-                        board.move_piece(piece, old_row, old_col)
-                        board.array[r][c] = dest
-                        if type(piece) == King or type(piece) == Rook:
-                            piece.moved = False
-                        continue  # move is not allowed stop further execution
-
-                    score, Piece, move = minimax(board, depth - 1, alpha, beta, False)
-
-                    # Revert the move after getting score to get back to initial board state
-                    board.move_piece(piece, old_row, old_col)
-                    board.array[r][c] = dest
-
-                    # Check king or rook piece's moved state
-                    if type(piece) == King or type(piece) == Rook:
-                        if check_castle is False:
-                            piece.moved = False
-
-                    # Change value to score if score is bigger,change initial piece and move to new piece and move
-                    # returned by minimax function
-                    if score > value:
-                        value = score
-                        best_row = r
-                        best_col = c
-                        best_move = (best_row, best_col)
-                        best_piece = piece
-                    alpha = max(alpha, value)
-
-                    # break loop if alpha is bigger than beta
-                    if alpha >= beta:
-                        if type(piece) == King or type(piece) == Rook:
-                            piece.moved = True
-                        return value, piece, best_move
-
-        # Return initial value if no move found which means ai in checkmate
-        if type(best_piece) == King or type(best_piece) == Rook:
-            best_piece.moved = True
-        return value, best_piece, (best_row, best_col)
-
-    else:  # Minimizing player with white piece
-
-        # Set initial score value
-        value = math.inf
-
-        # Get all valid moves available to player
-        valid_moves = board.opponent_moves('w')
-
-        # Pick move randomly, this move will get changed based on minimax score
-        best_row, best_col = random.choice(valid_moves)
-
-        # Get moves by pieces
-        player_moves = board.possible_moves('w')
-
-        # Initialize piece with None,it will changed based on minimax score
-        best_piece = None
-
-        # Iterate over all possible moves by each piece
-        for piece, move_list in player_moves:
-
-            # Check for castling possibility
-            castle_moves = []
-            left_castle, right_castle = board.castling('w')
-            if type(piece) == King:
-                if left_castle:
-                    for move in left_castle:
-                        castle_moves.append(move)
-                if right_castle:
-                    for move in right_castle:
-                        castle_moves.append(move)
-
-            # Add castling moves to piece move_list
-            moves = move_list + castle_moves
-
-            # Check if castling is allowed at given position
-            for r, c in moves:
-                # preserve initial piece and coordinates
-                old_row = piece.row
-                old_col = piece.col
-                dest = board.array[r][c]
-
-                # Make castling move if possible at given coordinates
-                if (r, c) in castle_moves:
-                    castle = board.castling_move(piece, r, c, 'w')
-                    if castle:
-                        score, Piece, move = minimax(board, depth - 1, alpha, beta, True)
-
-                        # Reverse the move to get back to initial board state
-                        if [(r, c)] == left_castle:
-                            board.move_piece(piece, old_row, old_col)
-                            board.move_piece(board.white_rook_left, r, c - 2)
-                            board.white_king.moved = False
-                            board.white_rook_left.moved = False
-                        if [(r, c)] == right_castle:
-                            board.move_piece(piece, old_row, old_col)
-                            board.move_piece(board.white_rook_right, r, c + 1)
-                            board.white_king.moved = False
-                            board.white_rook_right.moved = False
-                        if score < value:
-                            value = score
-                            best_row = r
-                            best_col = c
-                            best_move = (best_row, best_col)
-                            best_piece = piece
-                        beta = min(beta, value)
-                        if alpha >= beta:
-                            return value, piece, best_move
-
-                else:
-                    # Check for pawn promotion
-                    promotion = board.move_piece(piece, r, c)
-                    if type(piece) == King or type(piece) == Rook:
-                        check_castle = piece.moved
-                        piece.moved = True
-
-                    # Check if move put player in check
-                    check = board.is_checked('w')
-                    if check:
-                        # Reverse the move if move put piece in check
-                        board.move_piece(piece, old_row, old_col)
-                        board.array[r][c] = dest
-                        if type(piece) == King or type(piece) == Rook:
-                            piece.moved = False
-                        continue  # move is not allowed stop further execution
-
-                    score, Piece, move = minimax(board, depth - 1, alpha, beta, True)
-
-                    # Revert the move after getting score to get back to initial board state
-                    board.move_piece(piece, old_row, old_col)
-                    board.array[r][c] = dest
-
-                    # Check king or rook piece's moved state
-                    if type(piece) == King or type(piece) == Rook:
-                        if check_castle is False:
-                            piece.moved = False
-
-                    # Change value to score if score is smaller,change initial piece and move to new piece and move
-                    # returned by minimax function
-                    if score < value:
-                        value = score
-                        best_row = r
-                        best_col = c
-                        best_move = (best_row, best_col)
-                        best_piece = piece
-                    beta = min(beta, value)
-
-                    # break loop if alpha is bigger than beta
-                    if alpha >= beta:
-                        return value, piece, best_move
-
-        # Return initial value if no move found which means player in checkmate
-        return value, best_piece, (best_row, best_col)
+        search.evaluations += 1
+        return score_value(board, board.turn), 0
+
+    table = search.table
+
+    # Look up position in transposition table
+    alpha_start = alpha
+    tt_move = 0
+    entry = table.probe(board.hash)
+    if entry is not None:
+        tt_depth, tt_score, bound, tt_move = entry
+        # Root needs a move, entry without one is only used for ordering there
+        if tt_depth >= depth and (tt_move or ply > 0):
+            if bound == EXACT or (bound == LOWER and tt_score >= beta) or (bound == UPPER and tt_score <= alpha):
+                return tt_score, tt_move
+
+    color = board.turn
+    in_check = board.is_checked(color)
+
+    # Null move pruning: if side to move can pass and a reduced search still fails high, skip this node.
+    # not tried at root, in check, after other null move or with only king and pawns left (zugzwang)
+    if (search.null_move and depth >= null_move_depth and ply > 0 and not in_check and beta != math.inf
+            and board.history and board.history[-1][0] is not None and has_pieces(board, color)):
+        board.make_null_move()
+        score, _ = negamax(board, depth - 1 - null_move_reduction, -beta, -beta + 1, search, ply + 1)
+        board.unmake_move()
+        if -score >= beta:
+            return beta, 0
+
+    # Value stays at -inf if no legal move is found and side to move is in check, which is checkmate
+    value = -math.inf
+    best_move = 0
+
+    # Move stored in transposition table or principal variation of previous iteration is tried first
+    moves = generate_moves(board, color)
+    first = tt_move or search.pv.get(board.hash, 0)
+    if search.ordering:
+        moves = order_moves(board, moves, search, ply, first)
+    else:
+        moves = [(0, move) for move in moves]
+
+    # Iterate over all possible moves
+    squares = board.array
+    searched = 0
+    for order, move in moves:
+        piece = squares[move >> 9 & 7][move >> 6 & 7]
+        board.make_encoded_move(move)
+
+        # Skip move if it puts own king in check
+        if board.is_checked(color):
+            board.unmake_move()
+            continue
+
+        if searched == 0 or alpha == -math.inf:
+            score, _ = negamax(board, depth - 1, -beta, -alpha, search, ply + 1)
+            score = -score
+        else:
+            # Late move reduction of quiet moves ordered late, searched again at full depth if it beats alpha
+            reduce = (search.reductions and depth >= lmr_depth and searched >= lmr_moves and ply > 0 and not in_check
+                      and not move & (capture_flag | promotion_flag) and move != first
+                      and move not in search.killers[ply] and not board.is_checked(board.turn))
+            score, _ = negamax(board, depth - 2 if reduce else depth - 1, -alpha - 1, -alpha, search, ply + 1)
+            score = -score
+            if reduce and score > alpha:
+                score, _ = negamax(board, depth - 1, -alpha - 1, -alpha, search, ply + 1)
+                score = -score
+
+            # Null window search failed high, find exact score with full window
+            if alpha < score < beta:
+                search.researches += 1
+                score, _ = negamax(board, depth - 1, -beta, -alpha, search, ply + 1)
+                score = -score
+        searched += 1
+
+        # Revert the move after getting score to get back to initial board state
+        board.unmake_move()
+
+        # First legal move is kept even if it loses, so node with legal moves never returns move 0
+        if score > value or searched == 1:
+            value = score
+            best_move = move
+        alpha = max(alpha, value)
+
+        # break loop if alpha is bigger than beta
+        if alpha >= beta:
+            search.cutoffs += 1
+            if searched == 1:
+                search.first_move_cutoffs += 1
+
+            # Quiet move causing cutoff becomes killer move of this ply and gains history score
+            if not move & capture_flag:
+                killers = search.killers[ply]
+                if move != killers[0]:
+                    killers[1] = killers[0]
+                    killers[0] = move
+                scores = search.history[piece.color, type(piece)]
+                scores[move & 63] += depth * depth
+                if scores[move & 63] >= history_limit:
+                    search.age_history()
+            break
+
+    # No legal move without check is stalemate
+    if searched == 0 and not in_check:
+        value = 0
+
+    # Store result with bound type based on original window
+    if value <= alpha_start:
+        bound = UPPER
+    elif value >= beta:
+        bound = LOWER
+    else:
+        bound = EXACT
+    table.store(board.hash, depth, value, bound, best_move)
+
+    return value, best_move
+
+
+def principal_variation(board, table, depth):
+    """
+    Follow best moves stored in transposition table from current position and
+    return them as list of (position hash, encoded move) tuples
+    """
+    pv = []
+    for i in range(depth):
+        entry = table.probe(board.hash)
+        if entry is None or not entry[3]:
+            break
+        from_row, from_col, r, c = decode_move(entry[3])
+        piece = board.array[from_row][from_col]
+        if piece is None or piece.color != board.turn:
+            break
+        pv.append((board.hash, entry[3]))
+        board.make_encoded_move(entry[3])
+
+    for move in pv:
+        board.unmake_move()
+
+    return pv
+
+
+def principal_variation_names(board, table, depth):
+    """
+    Return principal variation stored in transposition table as list of moves in coordinate notation
+    """
+    pv = principal_variation(board, table, depth)
+    names = []
+    for key, move in pv:
+        names.append(move_name(*board.decode(move)))
+        board.make_encoded_move(move)
+
+    for move in pv:
+        board.unmake_move()
+
+    return names
+
+
+def mate_moves(score, pv):
+    """
+    Return moves to mate of score from point of view of side to move, negative if side to move gets mated and
+    None if score is no mate score. moves to mate of infinite scores are counted from principal variation
+    and of tablebase scores from plies left to mate counted from root
+    """
+    if score == math.inf:
+        return max(1, (len(pv) + 1) // 2)
+    if score == -math.inf:
+        return -max(1, len(pv) // 2)
+    if abs(score) > tablebase_win - 1000:
+        plies = tablebase_win - abs(score)
+        return (plies + 1) // 2 if score > 0 else -(plies // 2)
+    return None
+
+
+def aspiration_search(board, depth, previous, search):
+    """
+    Search root with narrow window around score of previous iteration. window is widened on the side
+    where search fails low or high and position is searched again until score falls inside it
+    """
+    if previous is None or previous in (math.inf, -math.inf) or depth < aspiration_depth:
+        return negamax(board, depth, -math.inf, math.inf, search)
+
+    delta = aspiration_window
+    alpha = previous - delta
+    beta = previous + delta
+    while True:
+        score, move = negamax(board, depth, alpha, beta, search)
+        if score <= alpha and alpha != -math.inf:
+            delta *= 4
+            alpha = previous - delta if delta < aspiration_limit else -math.inf
+        elif score >= beta and beta != math.inf:
+            delta *= 4
+            beta = previous + delta if delta < aspiration_limit else math.inf
+        else:
+            return score, move
+        search.researches += 1
+
+
+def iterative_deepening(board, time_limit=None, node_limit=None, max_depth=64, search=None, report=None):
+    """
+    Search position for side to move with depth 1, 2, 3 ... until time limit (seconds) or node limit runs out
+    or max_depth is reached. every iteration tries principal variation of previous one first and starts with
+    aspiration window around its score.
+    report is called after every completed depth with (depth, score, nodes, seconds, principal variation
+    as list of moves in coordinate notation).
+    returns (score, move, depth) of last completed depth with score from point of view of side to move and
+    move encoded as integer (0 if side to move has no move). depth 1 is always completed unless search is
+    stopped, None is returned if no depth is completed
+    """
+    if search is None:
+        search = Search(time_limit=time_limit, node_limit=node_limit)
+    start = time.perf_counter()
+    history = len(board.history)
+    result = None
+
+    for depth in range(1, max_depth + 1):
+        try:
+            score, move = aspiration_search(board, depth, result[0] if result else None, search)
+        except SearchAborted:
+            # Take back moves left on board by aborted search
+            while len(board.history) > history:
+                board.unmake_move()
+            break
+
+        # Move of previous depth is kept if this depth returned none
+        if not move and result is not None:
+            move = result[1]
+        result = score, move, depth
+        search.abortable = True
+        search.iterations.append((depth, score, search.nodes, time.perf_counter() - search.start))
+
+        # Remember principal variation for ordering of next iteration
+        search.pv = dict(principal_variation(board, search.table, depth))
+        if report is not None:
+            report(*search.iterations[-1], principal_variation_names(board, search.table, depth))
+
+        # Stop on forced mate or if next iteration can not finish within time limit
+        if score in (math.inf, -math.inf) or not move:
+            break
+        if time_limit is not None and time.perf_counter() - start > time_limit / 2:
+            break
+
+    return result
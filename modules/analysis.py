@@ -0,0 +1,91 @@
+import collections
+import multiprocessing
+import time
+
+from modules.AI import *
+
+
+def parse_epd(line):
+    """
+    Split FEN or EPD line into (FEN, operations). EPD operations like bm and id are returned as
+    {opcode: operand}, move counters of FEN lines are kept in FEN
+    """
+    fields = line.split()
+    count = 6 if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit() else 4
+    operations = {}
+    for operation in ' '.join(fields[count:]).split(';'):
+        opcode, _, operand = operation.strip().partition(' ')
+        if opcode:
+            operations[opcode] = operand.strip().strip('"')
+    return ' '.join(fields[:count]), operations
+
+
+def analyze(line, depth=None, time_limit=None):
+    """
+    Search position of FEN/EPD line to given depth or for given seconds and return result as dict.
+    score is from point of view of side to move. if line has bm operation result tells if best move
+    was found. invalid lines give dict with error
+    """
+    fen, operations = parse_epd(line)
+    try:
+        board = Board(fen)
+    except (ValueError, KeyError, IndexError) as error:
+        return {'line': line, 'error': "invalid position: {}".format(error)}
+
+    transposition_table.clear()
+    search = Search(time_limit=time_limit)
+    score, move, completed = iterative_deepening(board, time_limit=time_limit, max_depth=depth or 64,
+                                                 search=search)
+    elapsed = time.perf_counter() - search.start
+
+    # Mate scores are given as moves to mate, score is then None so result stays valid JSON
+    pv = principal_variation_names(board, search.table, completed)
+    mate = mate_moves(score, pv)
+    result = {'fen': board.to_fen()}
+    if 'id' in operations:
+        result['id'] = operations['id']
+    result.update({
+        'depth': completed,
+        'score': int(score) if mate is None else None,
+        'mate': mate,
+        'best_move': move_name(*board.decode(move)) if move else None,
+        'san': board.san(*board.decode(move)) if move else None,
+        'pv': pv,
+        'nodes': search.nodes,
+        'seconds': round(elapsed, 4),
+    })
+
+    # Expected best moves are given in standard algebraic notation
+    if 'bm' in operations:
+        expected = [move.rstrip('+#!?') for move in operations['bm'].split()]
+        result['bm'] = operations['bm']
+        result['solved'] = bool(move) and result['san'].rstrip('+#') in expected
+
+    return result
+
+
+def analyze_lines(lines, depth=None, time_limit=None, workers=1):
+    """
+    Analyze FEN/EPD lines and yield results in input order, empty lines and lines starting with # are skipped.
+    with more than one worker positions are searched by process pool and only two positions per worker
+    are read ahead, so input of any size is streamed
+    """
+    lines = (line.strip() for line in lines)
+    lines = (line for line in lines if line and not line.startswith('#'))
+    if workers <= 1:
+        for line in lines:
+            yield analyze(line, depth, time_limit)
+        return
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        pending = collections.deque()
+        for line in lines:
+            pending.append(pool.apply_async(analyze, (line, depth, time_limit)))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+        pool.join()
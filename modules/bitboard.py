@@ -0,0 +1,288 @@
+from modules.board import *
+
+# Square (row,col) maps to bit row * 8 + col, so bit 0 is the top left square (black rook side)
+
+# Ray directions as (row,col) steps. positive directions move towards higher bit index
+linear_directions = ((0, 1), (1, 0), (0, -1), (-1, 0))
+diagonal_directions = ((1, 1), (1, -1), (-1, -1), (-1, 1))
+
+
+def square_mask(row, col):
+    """
+    Return mask with single bit set for (row,col) square
+    """
+    return 1 << (row * 8 + col)
+
+
+def step_masks(offsets):
+    """
+    Build list of 64 masks, one per square, with every square reachable by a single (row,col) offset
+    """
+    masks = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        mask = 0
+        for row_step, col_step in offsets:
+            new_row, new_col = row + row_step, col + col_step
+            if 0 <= new_row < 8 and 0 <= new_col < 8:
+                mask |= square_mask(new_row, new_col)
+        masks.append(mask)
+    return masks
+
+
+def ray_masks(direction):
+    """
+    Build list of 64 masks, one per square, with every square on the ray leaving that square
+    in given direction (square itself excluded)
+    """
+    masks = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        mask = 0
+        row += direction[0]
+        col += direction[1]
+        while 0 <= row < 8 and 0 <= col < 8:
+            mask |= square_mask(row, col)
+            row += direction[0]
+            col += direction[1]
+        masks.append(mask)
+    return masks
+
+
+knight_attacks = step_masks([(-1, -2), (-1, 2), (-2, -1), (-2, 1), (1, -2), (1, 2), (2, -1), (2, 1)])
+king_attacks = step_masks([(1, 1), (-1, -1), (1, -1), (-1, 1), (0, 1), (1, 0), (-1, 0), (0, -1)])
+
+# Squares attacked by a pawn of given color standing on a square
+pawn_attacks = {'w': step_masks([(-1, -1), (-1, 1)]), 'b': step_masks([(1, -1), (1, 1)])}
+
+rays = {direction: ray_masks(direction) for direction in linear_directions + diagonal_directions}
+
+
+def slide(square, direction, occupied):
+    """
+    Return mask of squares a sliding piece on square reaches in given direction,
+    ray stops at (and includes) first occupied square
+    """
+    ray = rays[direction][square]
+    blockers = ray & occupied
+    if blockers:
+        if direction[0] > 0 or (direction[0] == 0 and direction[1] > 0):
+            blocker = (blockers & -blockers).bit_length() - 1
+        else:
+            blocker = blockers.bit_length() - 1
+        ray ^= rays[direction][blocker]
+    return ray
+
+
+def squares(mask):
+    """
+    Yield index of every set bit in mask from lowest to highest
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+# Sliding rays as (masks by square, True if ray runs towards higher bits)
+linear_ray_masks = [(rays[direction], direction[0] > 0 or (direction[0] == 0 and direction[1] > 0))
+                    for direction in linear_directions]
+diagonal_ray_masks = [(rays[direction], direction[0] > 0) for direction in diagonal_directions]
+
+# Every square on linear and on diagonal rays of a square, sliders outside can not attack the square
+linear_lines = [rays[(0, 1)][square] | rays[(1, 0)][square] | rays[(0, -1)][square] | rays[(-1, 0)][square]
+                for square in range(64)]
+diagonal_lines = [rays[(1, 1)][square] | rays[(1, -1)][square] | rays[(-1, -1)][square] | rays[(-1, 1)][square]
+                  for square in range(64)]
+
+piece_types = (Pawn, Knight, Bishop, Rook, Queen, King)
+opponents = {'w': 'b', 'b': 'w'}
+
+# Rows pawns of each color promote on
+promotion_rows = {'w': 0xff, 'b': 0xff << 56}
+
+# (row,col) coordinates of every bit
+coordinates = [divmod(square, 8) for square in range(64)]
+
+
+def slide_targets(square, ray_masks, occupied):
+    """
+    Return mask of squares a sliding piece on square reaches along given rays, every ray stops at
+    (and includes) first occupied square
+    """
+    targets = 0
+    for masks, forward in ray_masks:
+        ray = masks[square]
+        blockers = ray & occupied
+        if blockers:
+            if forward:
+                ray ^= masks[(blockers & -blockers).bit_length() - 1]
+            else:
+                ray ^= masks[blockers.bit_length() - 1]
+        targets |= ray
+    return targets
+
+
+def slider_attacks(square, ray_masks, occupied, sliders):
+    """
+    Check if any of sliders attacks square along given rays, first occupied square on a ray decides
+    """
+    for masks, forward in ray_masks:
+        blockers = masks[square] & occupied
+        if blockers & sliders:
+            if forward:
+                if blockers & -blockers & sliders:
+                    return True
+            elif 1 << (blockers.bit_length() - 1) & sliders:
+                return True
+    return False
+
+
+class BitBoard(Board):
+    """
+    Board backend that keeps one 64 bit integer per piece type plus occupancy mask of each side.
+    board array and piece objects are still kept so search and chess.py can use it in place of Board,
+    but move generation and attack tests are done with mask operations.
+    """
+
+    def __init__(self, fen=None):
+        super().__init__(fen)
+
+        # Masks of both colors indexed by piece class, occupancy indexed by color
+        self.masks = {piece_type: 0 for piece_type in piece_types}
+        self.occupancy = {'w': 0, 'b': 0}
+        for i in range(8):
+            for j in range(8):
+                piece = self.array[i][j]
+                if piece is not None:
+                    self.masks[type(piece)] |= square_mask(i, j)
+                    self.occupancy[piece.color] |= square_mask(i, j)
+
+    def put_piece(self, row, col, piece):
+        """
+        Place piece object (or None for empty square) at (row,col) position. zobrist hash, score and
+        masks are updated for removed and placed piece
+        """
+        square = row * 8 + col
+        bit = 1 << square
+        old = self.array[row][col]
+        if old is not None:
+            kind = type(old)
+            self.hash ^= piece_keys[old.color, kind][square]
+            self.score -= square_values[old.color, kind][square]
+            self.piece_count -= 1
+            self.masks[kind] ^= bit
+            self.occupancy[old.color] ^= bit
+        if piece is not None:
+            kind = type(piece)
+            self.hash ^= piece_keys[piece.color, kind][square]
+            self.score += square_values[piece.color, kind][square]
+            self.piece_count += 1
+            self.masks[kind] ^= bit
+            self.occupancy[piece.color] ^= bit
+        self.array[row][col] = piece
+
+    def pawn_targets(self, square, color, occupied, enemy):
+        """
+        Return mask of squares where pawn of given color standing on square can move, occupied is mask of
+        all pieces and enemy of pieces pawn can capture including en passant square
+        """
+        targets = pawn_attacks[color][square] & enemy
+        forward = square + (8 if color == 'b' else -8)
+        if not occupied >> forward & 1:
+            targets |= 1 << forward
+            if square >> 3 == (1 if color == 'b' else 6):
+                forward += 8 if color == 'b' else -8
+                if not occupied >> forward & 1:
+                    targets |= 1 << forward
+        return targets
+
+    def possible_moves(self, color):
+        """
+        Generates all possible moves by a side of given color.
+        returns list of tuples which contains particular piece and list of coordinates where it can move.
+        """
+        return self.target_lists(color, -1, -1)
+
+    def possible_captures(self, color):
+        """
+        Like possible_moves but only with captures, en passant captures and pawn moves to last row
+        """
+        enemy = self.occupancy[opponents[color]]
+        pawn_allowed = enemy | promotion_rows[color]
+        if self.en_passant is not None:
+            pawn_allowed |= square_mask(*self.en_passant)
+        return self.target_lists(color, enemy, pawn_allowed)
+
+    def target_lists(self, color, allowed, pawn_allowed):
+        """
+        Return list of (piece, list of (row,col) targets) of every piece of given color that has a target
+        in allowed mask, pawn_allowed is used for pawns
+        """
+        possible_moves = []
+        array = self.array
+        masks = self.masks
+        own = self.occupancy[color]
+        occupied = own | self.occupancy[opponents[color]]
+        allowed &= ~own
+        pawn_allowed &= ~own
+
+        # Pawns capture pieces of opponent and pawn on en passant square, pawns never stand on last row
+        enemy = occupied ^ own
+        if self.en_passant is not None and self.en_passant[0] == (2 if color == 'w' else 5):
+            enemy |= square_mask(*self.en_passant)
+
+        pieces = own
+        while pieces:
+            low = pieces & -pieces
+            pieces ^= low
+            square = low.bit_length() - 1
+            if low & masks[Knight]:
+                targets = knight_attacks[square] & allowed
+            elif low & masks[Pawn]:
+                targets = self.pawn_targets(square, color, occupied, enemy) & pawn_allowed
+            elif low & masks[Bishop]:
+                targets = slide_targets(square, diagonal_ray_masks, occupied) & allowed
+            elif low & masks[Rook]:
+                targets = slide_targets(square, linear_ray_masks, occupied) & allowed
+            elif low & masks[Queen]:
+                targets = (slide_targets(square, linear_ray_masks, occupied)
+                           | slide_targets(square, diagonal_ray_masks, occupied)) & allowed
+            else:
+                targets = king_attacks[square] & allowed
+            if not targets:
+                continue
+
+            move_list = []
+            while targets:
+                low = targets & -targets
+                targets ^= low
+                move_list.append(coordinates[low.bit_length() - 1])
+            possible_moves.append((array[square >> 3][square & 7], move_list))
+
+        return possible_moves
+
+    def is_square_attacked(self, row, col, by_color):
+        """
+        Check if any piece of by_color attacks (row,col) square. knight, king and pawn patterns of
+        the square are tested against piece masks, rays only for sliders standing on them
+        """
+        square = row * 8 + col
+        masks = self.masks
+        enemy = self.occupancy[by_color]
+
+        # A pawn attacks square if a pawn of other color on square would attack the pawn
+        if (knight_attacks[square] & masks[Knight] & enemy or king_attacks[square] & masks[King] & enemy
+                or pawn_attacks[opponents[by_color]][square] & masks[Pawn] & enemy):
+            return True
+
+        occupied = enemy | self.occupancy[opponents[by_color]]
+        queens = masks[Queen]
+        sliders = (masks[Rook] | queens) & enemy
+        if sliders & linear_lines[square] and slider_attacks(square, linear_ray_masks, occupied, sliders):
+            return True
+        sliders = (masks[Bishop] | queens) & enemy
+        if sliders & diagonal_lines[square] and slider_attacks(square, diagonal_ray_masks, occupied, sliders):
+            return True
+
+        return False
@@ -1,4 +1,7 @@
 from modules.piece import *
+from modules.zobrist import *
+from modules.evaluation import *
+from modules.transposition import *
 
 
 def pawn_promotion(piece, row):
@@ -17,33 +20,212 @@ def pawn_promotion(piece, row):
         return False
 
 
+# FEN of start position and piece classes by FEN letter
+start_fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+fen_pieces = {'p': Pawn, 'n': Knight, 'b': Bishop, 'r': Rook, 'q': Queen, 'k': King}
+fen_letters = {piece_type: letter for letter, piece_type in fen_pieces.items()}
+
+# Pieces a pawn can promote to, index is stored in encoded moves
+promotion_types = (Knight, Bishop, Rook, Queen)
+
+
+def parse_square(name):
+    """
+    Convert square name like 'e2' to (row,col) coordinates, row 0 is black's back rank
+    """
+    return 8 - int(name[1]), ord(name[0]) - ord('a')
+
+
+def square_name(row, col):
+    """
+    Convert (row,col) coordinates to square name like 'e2'
+    """
+    return "abcdefgh"[col] + str(8 - row)
+
+
+def move_name(piece, row, col, promotion=Queen):
+    """
+    Return move of piece to (row,col) in coordinate notation like 'e2e4', promotions get
+    letter of promotion piece like 'e7e8q'
+    """
+    name = square_name(piece.row, piece.col) + square_name(row, col)
+    if type(piece) == Pawn and row in (0, 7):
+        name += fen_letters[promotion]
+    return name
+
+
 class Board:
     """
     Board is an 8x8 array that stores piece objects.None indicates empty square.
     'b' indicates side with black color pieces.'w' indicates side with white color pieces.
     """
 
-    def __init__(self):
+    def __init__(self, fen=None):
         self.empty = [[None for x in range(8)] for y in range(8)]
 
+        # Position is read from FEN string, start position by default
+        fields = (fen or start_fen).split()
+        if len(fields) < 2:
+            raise ValueError("invalid FEN: {}".format(fen))
+        castling = fields[2] if len(fields) > 2 else '-'
+        en_passant = fields[3] if len(fields) > 3 else '-'
+
+        # Move counters are optional, EPD lines have operations in their place
+        self.halfmove_clock = int(fields[4]) if len(fields) > 4 and fields[4].isdigit() else 0
+        self.fullmove_number = int(fields[5]) if len(fields) > 5 and fields[5].isdigit() else 1
+
+        self.array = [[None for x in range(8)] for y in range(8)]
+        for row, line in enumerate(fields[0].split('/')):
+            col = 0
+            for char in line:
+                if char.isdigit():
+                    col += int(char)
+                else:
+                    color = 'w' if char.isupper() else 'b'
+                    piece_type = fen_pieces[char.lower()]
+                    self.array[row][col] = piece_type(row, col, color)
+                    col += 1
+
         # King and rook objects are stored to make castling easy
-        self.black_king = King(0, 4, 'b', b_king)
-        self.white_king = King(7, 4, 'w', w_king)
-        self.white_rook_left = Rook(7, 0, 'w', w_rook)
-        self.white_rook_right = Rook(7, 7, 'w', w_rook)
-        self.black_rook_left = Rook(0, 0, 'b', b_rook)
-        self.black_rook_right = Rook(0, 7, 'b', b_rook)
-        self.array = [
-            [self.black_rook_left, Knight(0, 1, 'b', b_knight), Bishop(0, 2, 'b', b_bishop), Queen(0, 3, 'b', b_queen),
-             self.black_king, Bishop(0, 5, 'b', b_bishop), Knight(0, 6, 'b', b_knight), self.black_rook_right],
-            [Pawn(1, i, 'b', b_pawn) for i in range(8)],
-            [None for x in range(8)],
-            [None for x in range(8)],
-            [None for x in range(8)],
-            [None for x in range(8)],
-            [Pawn(6, i, 'w', w_pawn) for i in range(8)],
-            [self.white_rook_left, Knight(7, 1, 'w', w_knight), Bishop(7, 2, 'w', w_bishop), Queen(7, 3, 'w', w_queen),
-             self.white_king, Bishop(7, 5, 'w', w_bishop), Knight(7, 6, 'w', w_knight), self.white_rook_right]]
+        self.white_king = self.find_king('w')
+        self.black_king = self.find_king('b')
+        self.white_king.moved = 'K' not in castling and 'Q' not in castling
+        self.black_king.moved = 'k' not in castling and 'q' not in castling
+        self.white_rook_left = self.castle_rook(7, 0, 'w', 'Q' in castling)
+        self.white_rook_right = self.castle_rook(7, 7, 'w', 'K' in castling)
+        self.black_rook_left = self.castle_rook(0, 0, 'b', 'q' in castling)
+        self.black_rook_right = self.castle_rook(0, 7, 'b', 'k' in castling)
+
+        # Square a pawn can capture en passant on this move, None if last move was not a double pawn push
+        self.en_passant = parse_square(en_passant) if en_passant != '-' else None
+
+        # Undo records of moves made with make_move, last move on top
+        self.history = []
+
+        # Pieces used for pawn promotion, one per pawn and piece type so promotions inside search reuse them
+        self.promotions = {}
+
+        # Side to move and zobrist hash of position, hash is updated incrementally on every move
+        self.turn = fields[1]
+        self.hash = self.compute_hash()
+
+        # Material and piece-square score from white's point of view, updated incrementally on every move
+        self.score = self.compute_score()
+
+        # Number of pieces on board, kings included, used to find endgames covered by tablebases
+        self.piece_count = sum(piece is not None for line in self.array for piece in line)
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Create board with position given as FEN string
+        """
+        return cls(fen)
+
+    def to_fen(self):
+        """
+        Return position as FEN string, castling rights come from moved flags of king and rook objects
+        and move counters are kept up to date by make_move
+        """
+        rows = []
+        for line in self.array:
+            text = ''
+            empty = 0
+            for piece in line:
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                letter = fen_letters[type(piece)]
+                text += letter.upper() if piece.color == 'w' else letter
+            if empty:
+                text += str(empty)
+            rows.append(text)
+
+        rights = self.castle_rights()
+        castling = ''.join(letter for bit, letter in ((2, 'K'), (1, 'Q'), (8, 'k'), (4, 'q')) if rights & bit)
+        en_passant = square_name(*self.en_passant) if self.en_passant is not None else '-'
+        return "{} {} {} {} {} {}".format('/'.join(rows), self.turn, castling or '-', en_passant,
+                                          self.halfmove_clock, self.fullmove_number)
+
+    def find_king(self, color):
+        """
+        Return king object of given color
+        """
+        for line in self.array:
+            for piece in line:
+                if type(piece) == King and piece.color == color:
+                    return piece
+        raise ValueError("no {} king on board".format(color))
+
+    def castle_rook(self, row, col, color, right):
+        """
+        Return rook used for castling from (row,col) corner. rook is marked as moved if castling right
+        is not given, placeholder rook is created off board if corner has no rook of that color
+        """
+        rook = self.array[row][col]
+        if type(rook) != Rook or rook.color != color:
+            rook = Rook(row, col, color)
+            rook.moved = True
+        elif not right:
+            rook.moved = True
+        return rook
+
+    def castle_rights(self):
+        """
+        Return castling rights as 4 bit integer, bit set while king and rook have not moved and rook
+        is still on its corner. bits: 1 white left, 2 white right, 4 black left, 8 black right
+        """
+        rights = 0
+        if not self.white_king.moved:
+            if not self.white_rook_left.moved and self.array[7][0] is self.white_rook_left:
+                rights |= 1
+            if not self.white_rook_right.moved and self.array[7][7] is self.white_rook_right:
+                rights |= 2
+        if not self.black_king.moved:
+            if not self.black_rook_left.moved and self.array[0][0] is self.black_rook_left:
+                rights |= 4
+            if not self.black_rook_right.moved and self.array[0][7] is self.black_rook_right:
+                rights |= 8
+        return rights
+
+    def compute_hash(self):
+        """
+        Compute zobrist hash of position from scratch: pieces, castling rights, en passant and side to move
+        """
+        key = castle_keys[self.castle_rights()]
+        if self.turn == 'b':
+            key ^= side_key
+        if self.en_passant is not None:
+            key ^= en_passant_keys[self.en_passant[1]]
+        for i in range(8):
+            for j in range(8):
+                piece = self.array[i][j]
+                if piece is not None:
+                    key ^= piece_keys[piece.color, type(piece)][i * 8 + j]
+        return key
+
+    def compute_score(self):
+        """
+        Compute material and piece-square score of position from scratch, positive score favours white
+        """
+        score = 0
+        for i in range(8):
+            for j in range(8):
+                piece = self.array[i][j]
+                if piece is not None:
+                    score += square_values[piece.color, type(piece)][i * 8 + j]
+        return score
+
+    def set_turn(self, color):
+        """
+        Set side to move, hash is updated if turn changes
+        """
+        if color != self.turn:
+            self.turn = color
+            self.hash ^= side_key
 
     def possible_moves(self, color):
         """
@@ -59,62 +241,335 @@ class Board:
 
         return possible_moves
 
-    def opponent_moves(self, color):
+    def possible_captures(self, color):
         """
-        Returns list of coordinates of squares where pieces of given color can move
+        Generates moves by a side of given color that can capture or promote, in same format as possible_moves.
+        array board can not pick them out cheaply so all moves are returned and caller keeps the captures
         """
-        opponent_moves = []
-        for i in range(8):
-            for j in range(8):
-                if self.array[i][j] is not None and self.array[i][j].color == color:
-                    move_list = self.array[i][j].valid_moves(self)
-                    for move in move_list:
-                        opponent_moves.append(move)
+        return self.possible_moves(color)
 
-        return opponent_moves
+    def is_square_attacked(self, row, col, by_color):
+        """
+        Check if any piece of by_color attacks (row,col) square. looks outward from the square along
+        precomputed linear and diagonal rays and at knight, king and pawn squares instead of generating
+        opponent moves
+        """
+        array = self.array
+
+        # Knights and king
+        for targets, piece_type in ((knight_targets, Knight), (king_targets, King)):
+            for new_row, new_col in targets[row][col]:
+                piece = array[new_row][new_col]
+                if piece is not None and piece.color == by_color and type(piece) == piece_type:
+                    return True
+
+        # White pawns attack upwards so they stand one row below square, black pawns one row above
+        pawn_row = row + 1 if by_color == 'w' else row - 1
+        if 0 <= pawn_row < 8:
+            for pawn_col in (col - 1, col + 1):
+                if 0 <= pawn_col < 8:
+                    piece = array[pawn_row][pawn_col]
+                    if piece is not None and piece.color == by_color and type(piece) == Pawn:
+                        return True
+
+        # Sliding pieces, first piece met on each ray decides
+        for rays, slider in ((linear_rays, Rook), (diagonal_rays, Bishop)):
+            for ray in rays[row][col]:
+                for new_row, new_col in ray:
+                    piece = array[new_row][new_col]
+                    if piece is not None:
+                        if piece.color == by_color and (type(piece) == slider or type(piece) == Queen):
+                            return True
+                        break
+
+        return False
 
     def is_checked(self, color):
         """
         Check if king piece of given color is in check
         """
         if color == 'w':
-            opponent_moves = self.opponent_moves('b')
-            if (self.white_king.row, self.white_king.col) in opponent_moves:
-                return True
+            return self.is_square_attacked(self.white_king.row, self.white_king.col, 'b')
 
         elif color == 'b':
-            opponent_moves = self.opponent_moves('w')
-            if (self.black_king.row, self.black_king.col) in opponent_moves:
-                return True
+            return self.is_square_attacked(self.black_king.row, self.black_king.col, 'w')
 
         return False
 
-    def move_piece(self, piece, row, col):
+    def is_legal(self, piece, row, col):
         """
-        Move piece to new position. if pawn promotion happen then respawn a Queen object.
-        if piece captures opponent piece then that square will be occupied by piece and original
-        location of piece will become empty square None.
+        Check if move of piece to (row,col) does not leave own king in check
         """
+        self.make_move(piece, row, col)
+        legal = not self.is_checked(piece.color)
+        self.unmake_move()
+        return legal
 
-        # Check if move cause pawn promotion
-        promotion = pawn_promotion(piece, row)
-        old_col = piece.col
-        old_row = piece.row
-        piece.col = col
+    def has_legal_move(self, color):
+        """
+        Check if side of given color has any legal move, castling is left out as it never
+        decides between check and checkmate or stalemate
+        """
+        for piece, move_list in self.possible_moves(color):
+            for row, col in move_list:
+                if self.is_legal(piece, row, col):
+                    return True
+        return False
+
+    def repetitions(self):
+        """
+        Return how many times current position occurred before since last capture or pawn move
+        """
+        start = max(0, len(self.history) - self.halfmove_clock)
+        return sum(1 for record in self.history[start:] if record[8] == self.hash)
+
+    def insufficient_material(self):
+        """
+        Check if neither side can checkmate: only kings are left or kings and a single Knight or Bishop
+        """
+        others = [type(piece) for row in self.array for piece in row if piece is not None and type(piece) != King]
+        return not others or (len(others) == 1 and others[0] in (Knight, Bishop))
+
+    def san(self, piece, row, col, promotion=Queen):
+        """
+        Return legal move of piece to (row,col) in standard algebraic notation like 'Nbd2', 'exd5',
+        'O-O' or 'e8=N+'
+        """
+        if type(piece) == King and abs(col - piece.col) == 2:
+            text = 'O-O' if col == 6 else 'O-O-O'
+        else:
+            capture = self.array[row][col] is not None or (type(piece) == Pawn and col != piece.col)
+            if type(piece) == Pawn:
+                text = ("abcdefgh"[piece.col] + 'x' if capture else '') + square_name(row, col)
+                if row in (0, 7):
+                    text += '=' + fen_letters[promotion].upper()
+            else:
+                # Other pieces of same type that can reach same square decide which coordinate is added
+                rivals = [other for other, move_list in self.possible_moves(piece.color)
+                          if other is not piece and type(other) == type(piece) and (row, col) in move_list
+                          and self.is_legal(other, row, col)]
+                origin = square_name(piece.row, piece.col)
+                if not rivals:
+                    origin = ''
+                elif all(other.col != piece.col for other in rivals):
+                    origin = origin[0]
+                elif all(other.row != piece.row for other in rivals):
+                    origin = origin[1]
+                text = fen_letters[type(piece)].upper() + origin + ('x' if capture else '') + square_name(row, col)
+
+        # Check and checkmate
+        self.make_move(piece, row, col, promotion)
+        if self.is_checked(self.turn):
+            text += '+' if self.has_legal_move(self.turn) else '#'
+        self.unmake_move()
+        return text
+
+    def make_move(self, piece, row, col, promotion=Queen):
+        """
+        Make move of piece to (row,col) and push undo record on history stack.
+        handles captures, en passant, pawn promotion to given piece type, castling (king moving two columns
+        moves rook too) and moved flags of king and rook. record is a tuple of (piece, from row, from col,
+        to row, to col, captured piece, promoted piece, previous moved flag, previous hash,
+        previous en passant square, previous halfmove clock)
+        """
+        from_row = piece.row
+        from_col = piece.col
+        captured = self.array[row][col]
+        promotes = pawn_promotion(piece, row)
+        promoted = None
+        moved = None
+        key = self.hash
+        rights = self.castle_rights()
+        en_passant = self.en_passant
+
+        # En passant capture removes pawn standing beside moving pawn
+        if type(piece) == Pawn and (row, col) == en_passant:
+            captured = self.array[from_row][col]
+            self.put_piece(from_row, col, None)
+
+        if type(piece) == King or type(piece) == Rook:
+            moved = piece.moved
+            piece.moved = True
+
+        self.put_piece(from_row, from_col, None)
         piece.row = row
-        self.array[old_row][old_col] = None
+        piece.col = col
 
-        if promotion:
-            if piece.color == 'b':
-                self.array[row][col] = Queen(row, col, piece.color, b_queen)
+        if promotes:
+            promoted = self.promotions.get((piece, promotion))
+            if promoted is None:
+                promoted = promotion(row, col, piece.color)
+                self.promotions[piece, promotion] = promoted
+            promoted.row = row
+            promoted.col = col
+            self.put_piece(row, col, promoted)
+        else:
+            self.put_piece(row, col, piece)
 
-            elif piece.color == 'w':
-                self.array[row][col] = Queen(row, col, piece.color, w_queen)
+        # Castling, move rook to other side of king
+        if type(piece) == King and abs(col - from_col) == 2:
+            rook_col, new_col = (0, 3) if col == 2 else (7, 5)
+            rook = self.array[row][rook_col]
+            self.put_piece(row, rook_col, None)
+            self.put_piece(row, new_col, rook)
+            rook.col = new_col
+            rook.moved = True
 
-            return self.array[row][col], piece
+        # Double pawn push allows en passant capture on square pawn passed
+        if type(piece) == Pawn and abs(row - from_row) == 2:
+            self.en_passant = ((row + from_row) // 2, col)
+        else:
+            self.en_passant = None
 
+        # Pieces are already hashed by put_piece, add change of castling rights, en passant and side to move
+        self.hash ^= castle_keys[rights] ^ castle_keys[self.castle_rights()] ^ side_key
+        if en_passant is not None:
+            self.hash ^= en_passant_keys[en_passant[1]]
+        if self.en_passant is not None:
+            self.hash ^= en_passant_keys[self.en_passant[1]]
+        # Halfmove clock counts moves since last capture or pawn move, move number grows after black moves
+        halfmove = self.halfmove_clock
+        if type(piece) == Pawn or captured is not None:
+            self.halfmove_clock = 0
         else:
-            self.array[row][col] = piece
+            self.halfmove_clock += 1
+        if self.turn == 'b':
+            self.fullmove_number += 1
+        self.turn = 'b' if self.turn == 'w' else 'w'
+
+        self.history.append((piece, from_row, from_col, row, col, captured, promoted, moved, key, en_passant,
+                             halfmove))
+
+    def unmake_move(self):
+        """
+        Revert last move made with make_move using record on top of history stack
+        """
+        piece, from_row, from_col, row, col, captured, promoted, moved, key, en_passant, halfmove = self.history.pop()
+
+        # Null move only passed turn
+        if piece is None:
+            self.turn = 'b' if self.turn == 'w' else 'w'
+            self.en_passant = en_passant
+            self.hash = key
+            return
+
+        if type(piece) == Pawn and (row, col) == en_passant:
+            # Pawn captured en passant goes back beside capturing pawn
+            self.put_piece(row, col, None)
+            self.put_piece(from_row, col, captured)
+        else:
+            self.put_piece(row, col, captured)
+        self.put_piece(from_row, from_col, piece)
+        piece.row = from_row
+        piece.col = from_col
+        if moved is not None:
+            piece.moved = moved
+
+        # Put rook back to its corner if move was castling
+        if type(piece) == King and abs(col - from_col) == 2:
+            rook_col, new_col = (0, 3) if col == 2 else (7, 5)
+            rook = self.array[row][new_col]
+            self.put_piece(row, new_col, None)
+            self.put_piece(row, rook_col, rook)
+            rook.col = rook_col
+            rook.moved = False
+
+        self.turn = 'b' if self.turn == 'w' else 'w'
+        if self.turn == 'b':
+            self.fullmove_number -= 1
+        self.halfmove_clock = halfmove
+        self.en_passant = en_passant
+        self.hash = key
+
+    def make_null_move(self):
+        """
+        Pass turn to other side without moving a piece, used by null move pruning of search.
+        record with piece None is pushed on history stack so unmake_move takes it back like any other move
+        """
+        key = self.hash
+        en_passant = self.en_passant
+        if en_passant is not None:
+            self.hash ^= en_passant_keys[en_passant[1]]
+            self.en_passant = None
+        self.hash ^= side_key
+        self.turn = 'b' if self.turn == 'w' else 'w'
+        self.history.append((None, None, None, None, None, None, None, None, key, en_passant, self.halfmove_clock))
+
+    def play(self, moves):
+        """
+        Make moves given as text in coordinate notation like 'e2e4' or 'e7e8n', pawns promote to Queen
+        if promotion letter is left out. raises ValueError at first illegal move, moves before it are made
+        """
+        for move in moves:
+            self.make_encoded_move(self.parse_move(move))
+
+    def encode(self, piece, row, col, promotion=Queen):
+        """
+        Return move of piece to (row,col) packed into 16-bit integer with promotion piece and capture flag
+        """
+        capture = self.array[row][col] is not None or (type(piece) == Pawn and col != piece.col)
+        index = promotion_types.index(promotion) if type(piece) == Pawn and row in (0, 7) else None
+        return encode_move(piece.row, piece.col, row, col, index, capture)
+
+    def decode(self, move):
+        """
+        Return (piece, row, col, promotion piece type) of encoded move, promotion is Queen for other moves
+        """
+        from_row, from_col, row, col = decode_move(move)
+        promotion = move_promotion(move)
+        return self.array[from_row][from_col], row, col, Queen if promotion is None else promotion_types[promotion]
+
+    def make_encoded_move(self, move):
+        """
+        Make move packed into integer by encode
+        """
+        promotion = promotion_types[move >> 12 & 3] if move & promotion_flag else Queen
+        self.make_move(self.array[move >> 9 & 7][move >> 6 & 7], move >> 3 & 7, move & 7, promotion)
+
+    def parse_move(self, text):
+        """
+        Return encoded move given as text in coordinate notation like 'e2e4' or 'e7e8n', pawns promote to Queen
+        if promotion letter is left out. raises ValueError if text is no legal move of side to move
+        """
+        if len(text) not in (4, 5) or any(square[0] not in "abcdefgh" or square[1] not in "12345678"
+                                          for square in (text[:2], text[2:4])):
+            raise ValueError("invalid move {}".format(text))
+        from_row, from_col = parse_square(text[:2])
+        row, col = parse_square(text[2:4])
+        piece = self.array[from_row][from_col]
+        if piece is None or piece.color != self.turn:
+            raise ValueError("illegal move {}: no piece of side to move on {}".format(text, text[:2]))
+
+        promotes = type(piece) == Pawn and row in (0, 7)
+        if len(text) == 5 and (not promotes or fen_pieces.get(text[4].lower()) not in promotion_types):
+            raise ValueError("invalid promotion {}".format(text))
+        promotion = fen_pieces[text[4].lower()] if len(text) == 5 else Queen
+
+        targets = piece.valid_moves(self)
+        if type(piece) == King:
+            left_castle, right_castle = self.castling(piece.color)
+            targets = targets + left_castle + right_castle
+        if (row, col) not in targets or not self.is_legal(piece, row, col):
+            raise ValueError("illegal move {}".format(text))
+        return self.encode(piece, row, col, promotion)
+
+    def put_piece(self, row, col, piece):
+        """
+        Place piece object (or None for empty square) at (row,col) position.
+        every change to board array goes through this method so other board backends can keep
+        their own representation in sync. zobrist hash and score are updated for removed and placed piece
+        """
+        square = row * 8 + col
+        old = self.array[row][col]
+        if old is not None:
+            self.hash ^= piece_keys[old.color, type(old)][square]
+            self.score -= square_values[old.color, type(old)][square]
+            self.piece_count -= 1
+        if piece is not None:
+            self.hash ^= piece_keys[piece.color, type(piece)][square]
+            self.score += square_values[piece.color, type(piece)][square]
+            self.piece_count += 1
+        self.array[row][col] = piece
 
     def castling(self, color):
         """
@@ -129,59 +584,26 @@ class Board:
             king = self.white_king
             left_rook = self.white_rook_left
             right_rook = self.white_rook_right
-            opponet_moves = self.opponent_moves('b')
+            opponent = 'b'
             row = 7
 
         elif color == "b":
             king = self.black_king
             left_rook = self.black_rook_left
             right_rook = self.black_rook_right
-            opponet_moves = self.opponent_moves('w')
+            opponent = 'w'
             row = 0
 
         if king.moved is False:
+            # Squares king passes are only tested for attacks when castling rights are still there
             if self.array[row][0] == left_rook and left_rook.moved is False:
                 if not self.array[row][1] and not self.array[row][2] and not self.array[row][3]:
-                    steps = {(row, 2), (row, 3), (row, 4)}
-                    if not steps.intersection(opponet_moves):
+                    if not any(self.is_square_attacked(row, col, opponent) for col in (4, 3, 2)):
                         left_castle_moves.append((row, 2))
 
             if self.array[row][7] == right_rook and right_rook.moved is False:
                 if not self.array[row][5] and not self.array[row][6]:
-                    steps = {(row, 4), (row, 5), (row, 6)}
-                    if not steps.intersection(opponet_moves):
+                    if not any(self.is_square_attacked(row, col, opponent) for col in (4, 5, 6)):
                         right_castle_moves.append((row, 6))
 
         return left_castle_moves, right_castle_moves
-
-    def castling_move(self, piece, row, col, color):
-        """
-        Returns true if castling move happens otherwise returns false by checking
-        castling possibility and available positions for castling i.e left or right castle
-        """
-        if type(piece) == King:
-            if color == 'w':
-                left_castle_moves, right_castle_moves = self.castling(color)
-                if [(row, col)] == left_castle_moves:
-                    self.move_piece(piece, row, col)
-                    self.move_piece(self.white_rook_left, row, col + 1)
-                    return True
-
-                elif [(row, col)] == right_castle_moves:
-                    self.move_piece(piece, row, col)
-                    self.move_piece(self.white_rook_right, row, col - 1)
-                    return True
-
-            if color == 'b':
-                left_castle_moves, right_castle_moves = self.castling(color)
-                if [(row, col)] == left_castle_moves:
-                    self.move_piece(piece, row, col)
-                    self.move_piece(self.black_rook_left, row, col + 1)
-                    return True
-
-                elif [(row, col)] == right_castle_moves:
-                    self.move_piece(piece, row, col)
-                    self.move_piece(self.black_rook_right, row, col - 1)
-                    return True
-
-        return False
@@ -0,0 +1,197 @@
+import mmap
+import os
+import random
+import struct
+
+from modules.AI import *
+from modules.polyglot import *
+
+# Polyglot book entry: key, move, weight, learn as big-endian unsigned 64, 16, 16 and 32 bit integers.
+# entries are sorted by key so all moves of one position are stored next to each other
+entry_format = struct.Struct('>QHHI')
+
+# Game results and weight they give to moves of white and black, games without result count once
+result_weights = {'1-0': (2, 0), '0-1': (0, 2), '1/2-1/2': (1, 1)}
+
+
+def encode_book_move(from_row, from_col, row, col, castling=False, promotion=None):
+    """
+    Encode move as Polyglot move: to file in bits 0-2, to rank in bits 3-5, from file in bits 6-8,
+    from rank in bits 9-11 and promotion piece in bits 12-14 (1 Knight ... 4 Queen, index of promotion_types
+    plus one), rank 0 is white's back rank. castling is stored as king capturing its own rook
+    """
+    if castling:
+        col = 0 if col < from_col else 7
+    move = (7 - from_row) << 9 | from_col << 6 | (7 - row) << 3 | col
+    if promotion is not None:
+        move |= (promotion + 1) << 12
+    return move
+
+
+def decode_book_move(board, move):
+    """
+    Return Polyglot move as (from row, from col, row, col, promotion index or None) on board, king capturing
+    own rook is turned into king moving two columns. pawn reaching last rank without promotion piece
+    promotes to Queen
+    """
+    col = move & 7
+    row = 7 - (move >> 3 & 7)
+    from_col = move >> 6 & 7
+    from_row = 7 - (move >> 9 & 7)
+    promotion = (move >> 12 & 7) - 1 if move >> 12 & 7 else None
+    piece = board.array[from_row][from_col]
+    target = board.array[row][col]
+    if type(piece) == King and type(target) == Rook and target.color == piece.color:
+        col = 2 if col < from_col else 6
+    if type(piece) == Pawn and row in (0, 7) and promotion is None:
+        promotion = promotion_types.index(Queen)
+    return from_row, from_col, row, col, promotion
+
+
+class OpeningBook:
+    """
+    OpeningBook reads Polyglot-format .bin book through mmap, so entries stay in page cache and are
+    never loaded into Python objects. position is found by binary search of its key.
+    keys are standard Polyglot keys of modules/polyglot.py, so books made by other Polyglot tools can be read
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.count = size // entry_format.size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    def close(self):
+        """
+        Unmap and close book file
+        """
+        if self.count:
+            self.data.close()
+        self.file.close()
+
+    def key_at(self, index):
+        """
+        Return key of entry at index
+        """
+        return struct.unpack_from('>Q', self.data, index * entry_format.size)[0]
+
+    def entries(self, key):
+        """
+        Return list of (move, weight) stored for position key
+        """
+        # First entry with key not smaller than searched key
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        entries = []
+        while low < self.count:
+            entry_key, move, weight, learn = entry_format.unpack_from(self.data, low * entry_format.size)
+            if entry_key != key:
+                break
+            entries.append((move, weight))
+            low += 1
+
+        return entries
+
+    def moves(self, board):
+        """
+        Return list of (move, weight) of legal book moves for side to move with moves encoded like
+        generate_moves. moves that are not legal on board (key collision or corrupt book) are left out
+        """
+        legal = {}
+        color = board.turn
+        for move in generate_moves(board, color):
+            board.make_encoded_move(move)
+            if not board.is_checked(color):
+                legal[decode_move(move) + (move_promotion(move),)] = move
+            board.unmake_move()
+
+        moves = []
+        for move, weight in self.entries(polyglot_key(board)):
+            move = legal.get(decode_book_move(board, move))
+            if weight and move is not None:
+                moves.append((move, weight))
+
+        return moves
+
+    def choose(self, board, generator=random):
+        """
+        Pick book move for side to move with probability proportional to its weight and return
+        it encoded like generate_moves, None if position is not in book
+        """
+        moves = self.moves(board)
+        if not moves:
+            return None
+
+        pick = generator.randrange(sum(weight for move, weight in moves))
+        for move, weight in moves:
+            if pick < weight:
+                return move
+            pick -= weight
+
+
+def book_entries(games, plies=16):
+    """
+    Count moves of first plies of every game as {(Polyglot key, Polyglot move): weight}.
+    games is iterable of (list of moves in coordinate notation, result or None). games with an invalid
+    or illegal move are skipped as a whole, returns (weights, number of skipped games)
+    """
+    weights = {}
+    skipped = 0
+    for moves, result in games:
+        board = Board()
+        white, black = result_weights.get(result, (1, 1))
+        entries = []
+        try:
+            for text in moves[:plies]:
+                move = board.parse_move(text)
+                from_row, from_col, row, col = decode_move(move)
+                piece = board.array[from_row][from_col]
+                weight = white if board.turn == 'w' else black
+                if weight:
+                    castling = type(piece) == King and abs(col - from_col) == 2
+                    entries.append(((polyglot_key(board), encode_book_move(from_row, from_col, row, col, castling,
+                                                                           move_promotion(move))), weight))
+                board.make_encoded_move(move)
+        except ValueError:
+            skipped += 1
+            continue
+
+        for entry, weight in entries:
+            weights[entry] = weights.get(entry, 0) + weight
+
+    return weights, skipped
+
+
+def build_book(games, path, plies=16):
+    """
+    Write Polyglot book of first plies of games to path, returns (number of entries, number of skipped games).
+    weights are scaled down to fit 16 bits if needed
+    """
+    weights, skipped = book_entries(games, plies)
+    scale = max(1, (max(weights.values(), default=0) + 65534) // 65535)
+    with open(path, 'wb') as file:
+        for (key, move), weight in sorted(weights.items(), key=lambda item: (item[0][0], -item[1])):
+            file.write(entry_format.pack(key, move, max(1, weight // scale), 0))
+
+    return len(weights), skipped
+
+
+def read_games(path):
+    """
+    Read game log with one game per line: moves in coordinate notation separated by spaces,
+    optionally followed by result (1-0, 0-1 or 1/2-1/2). yields (moves, result)
+    """
+    with open(path) as file:
+        for line in file:
+            moves = line.split()
+            if not moves or moves[0].startswith('#'):
+                continue
+            result = moves.pop() if moves[-1] in result_weights else None
+            yield moves, result
@@ -0,0 +1,180 @@
+import multiprocessing
+import os
+
+from modules.AI import *
+
+
+# Event shared by pool processes, set by main process to abort running tasks
+stop_event = None
+
+
+def init_worker(event):
+    """
+    Run once in every pool process: keep stop event of the pool
+    """
+    global stop_event
+    stop_event = event
+
+
+class PoolSearch(Search):
+    """
+    Search run in pool process, aborted like Search and also when stop event of pool is set
+    """
+
+    def count_node(self):
+        if self.nodes % check_interval == 0 and stop_event is not None and stop_event.is_set():
+            self.stopped = True
+        Search.count_node(self)
+
+
+def search_root_move(fen, move, depth, alpha, beta, time_limit=None):
+    """
+    Run in pool process: rebuild board from FEN, make root move and search the reply to depth - 1
+    within time_limit seconds. returns (move, score, nodes) with score from point of view of side to move
+    at root, score is None if search was aborted. depth 1 is only aborted by stop event.
+    every process keeps its own transposition table between tasks
+    """
+    board = Board(fen)
+    board.play([move])
+    search = PoolSearch(time_limit=time_limit)
+    search.abortable = depth > 1
+    try:
+        score, _ = negamax(board, depth - 1, -beta, -alpha, search, 1)
+    except SearchAborted:
+        return move, None, search.nodes
+    return move, -score, search.nodes
+
+
+class ParallelSearch:
+    """
+    ParallelSearch splits root moves of a position across a pool of processes. every task gets the
+    position as FEN string plus one root move. best score found so far is merged into the alpha/beta
+    bound handed to moves that are submitted later, so later root moves can be cut off.
+    search is iterative, every depth orders root moves by scores of previous depth. tasks share a stop
+    event and get the time left, so stop and time limit abort depth being searched
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.stop_event = multiprocessing.Event()
+        self.pool = multiprocessing.Pool(self.workers, initializer=init_worker, initargs=(self.stop_event,))
+        self.nodes = 0
+        self.iterations = []
+
+    def reset(self):
+        """
+        Clear stop request of last search, called before search is started so stop that arrives before
+        search gets going is not lost
+        """
+        self.stop_event.clear()
+
+    def stop(self):
+        """
+        Abort running search, it returns result of last completed depth
+        """
+        self.stop_event.set()
+
+    def close(self):
+        """
+        Stop worker processes
+        """
+        self.pool.terminate()
+        self.pool.join()
+
+    def search_depth(self, fen, moves, depth, deadline=None):
+        """
+        Search root moves to given depth, first move alone to get a bound and the rest in parallel
+        with at most one task per worker in flight. returns (best score, best move, list of (score, move)
+        of all root moves), None if search was stopped or ran out of time before depth was completed.
+        scores of moves that did not beat alpha are only upper bounds
+        """
+        alpha = -math.inf
+        beta = math.inf
+        best = None
+        results = []
+        pending = list(moves)
+        running = []
+        aborted = False
+
+        while pending or running:
+            # Keep every worker busy, first move is searched alone so others get its bound
+            while pending and not aborted and len(running) < (self.workers if results else 1):
+                move = pending.pop(0)
+                time_limit = max(deadline - time.perf_counter(), 0) if deadline is not None else None
+                running.append(self.pool.apply_async(search_root_move,
+                                                     (fen, move, depth, alpha, beta, time_limit)))
+            if not running:
+                break
+
+            running[0].wait()
+            for task in [task for task in running if task.ready()]:
+                running.remove(task)
+                move, score, nodes = task.get()
+                self.nodes += nodes
+                if score is None:
+                    # Tasks still running hit the same deadline or stop event
+                    aborted = True
+                    continue
+                results.append((score, move))
+
+                # Merge bound of finished move, move beating alpha becomes best move
+                if best is None or score > alpha:
+                    alpha = score
+                    best = move
+
+        if aborted:
+            return None
+        return alpha, best, results
+
+    def search(self, board, max_depth, time_limit=None, report=None):
+        """
+        Search position for side to move with depth 1 up to max_depth and return (score, move, depth)
+        of last completed depth with move encoded like generate_moves, None if search was stopped before
+        depth 1 was completed. depth being searched is aborted when time limit is used up or search is stopped,
+        new depth is not started once half of time limit is used. report is called after every depth like in
+        iterative_deepening, principal variation is only the best move
+        """
+        start = time.perf_counter()
+        deadline = start + time_limit if time_limit is not None else None
+        self.nodes = 0
+        self.iterations = []
+        color = board.turn
+        fen = board.to_fen()
+
+        # Legal root moves in coordinate notation, mapped back to encoded moves for result
+        moves = []
+        codes = {}
+        for move in generate_moves(board, color):
+            name = move_name(*board.decode(move))
+            board.make_encoded_move(move)
+            if not board.is_checked(color):
+                moves.append(name)
+                codes[name] = move
+            board.unmake_move()
+        if not moves:
+            # Checkmate or stalemate
+            return (-math.inf if board.is_checked(color) else 0), 0, 0
+
+        result = None
+        for depth in range(1, max_depth + 1):
+            completed = self.search_depth(fen, moves, depth, deadline)
+            if completed is None:
+                break
+            score, best, scores = completed
+
+            # Order moves for next depth: best move first, then by score, ties keep order of previous depth
+            order = {move: index for index, move in enumerate(moves)}
+            scores.sort(key=lambda item: (item[1] != best, -item[0], order[item[1]]))
+            moves = [move for score, move in scores]
+
+            result = score, codes[best], depth
+            self.iterations.append((depth, score, self.nodes, time.perf_counter() - start))
+            if report is not None:
+                report(*self.iterations[-1], [best])
+
+            if score in (math.inf, -math.inf) or self.stop_event.is_set():
+                break
+            if time_limit is not None and time.perf_counter() - start > time_limit / 2:
+                break
+
+        return result
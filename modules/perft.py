@@ -0,0 +1,52 @@
+from modules.AI import *
+
+# Reference positions with known leaf node counts for depth 1, 2, 3 ...
+reference_positions = [
+    ('start', start_fen,
+     [20, 400, 8902, 197281, 4865609]),
+    ('kiwipete', "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ('position3', "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ('position4', "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ('position5', "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ('position6', "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+
+def perft(board, depth):
+    """
+    Count leaf nodes of legal move tree of given depth from current position, side to move is board.turn
+    """
+    if depth == 0:
+        return 1
+
+    nodes = 0
+    color = board.turn
+    for move in generate_moves(board, color):
+        board.make_encoded_move(move)
+        if not board.is_checked(color):
+            nodes += perft(board, depth - 1)
+        board.unmake_move()
+
+    return nodes
+
+
+def divide(board, depth):
+    """
+    Return list of (move text, leaf node count) for every legal move of side to move, used to find
+    which move has wrong count when perft result differs from reference
+    """
+    counts = []
+    color = board.turn
+    for move in generate_moves(board, color):
+        name = move_name(*board.decode(move))
+        board.make_encoded_move(move)
+        if not board.is_checked(color):
+            counts.append((name, perft(board, depth - 1)))
+        board.unmake_move()
+
+    return sorted(counts)
@@ -1,52 +1,84 @@
-import pygame
-
-# Images for each piece
-b_bishop = "assets/bbishop.png"
-b_king = "assets/bking.png"
-b_knight = "assets/bknight.png"
-b_pawn = "assets/bpawn.png"
-b_queen = "assets/bqueen.png"
-b_rook = "assets/brook.png"
+# Sprite names for each piece, surfaces are cut from sprite atlas by the rendering layer in modules/sprites.py
+b_bishop = "bbishop"
+b_king = "bking"
+b_knight = "bknight"
+b_pawn = "bpawn"
+b_queen = "bqueen"
+b_rook = "brook"
+
+w_bishop = "wbishop"
+w_king = "wking"
+w_knight = "wknight"
+w_pawn = "wpawn"
+w_queen = "wqueen"
+w_rook = "wrook"
+
+# Steps of pieces as (row,col) offsets
+knight_offsets = [(-1, -2), (-1, 2), (-2, -1), (-2, 1), (1, -2), (1, 2), (2, -1), (2, 1)]
+king_offsets = [(1, 1), (-1, -1), (1, -1), (-1, 1), (0, 1), (1, 0), (-1, 0), (0, -1)]
+linear_steps = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+diagonal_steps = [(1, 1), (1, -1), (-1, -1), (-1, 1)]
+
+
+def jump_table(offsets):
+    """
+    Return 8x8 table that holds for every square a tuple of (row,col) squares reached with given offsets
+    without leaving board
+    """
+    return [[tuple((row + row_step, col + col_step) for row_step, col_step in offsets
+                   if 0 <= row + row_step < 8 and 0 <= col + col_step < 8)
+             for col in range(8)] for row in range(8)]
 
-w_bishop = "assets/wbishop.png"
-w_king = "assets/wking.png"
-w_knight = "assets/wknight.png"
-w_pawn = "assets/wpawn.png"
-w_queen = "assets/wqueen.png"
-w_rook = "assets/wrook.png"
 
-# Size of square block
-squaresize = 60
+def ray_table(steps):
+    """
+    Return 8x8 table that holds for every square a tuple of rays, one per step direction that does not
+    leave board at once. ray is tuple of (row,col) squares from nearest to farthest
+    """
+    table = [[[] for col in range(8)] for row in range(8)]
+    for row in range(8):
+        for col in range(8):
+            for row_step, col_step in steps:
+                ray = []
+                new_row = row + row_step
+                new_col = col + col_step
+                while 0 <= new_row < 8 and 0 <= new_col < 8:
+                    ray.append((new_row, new_col))
+                    new_row += row_step
+                    new_col += col_step
+                if ray:
+                    table[row][col].append(tuple(ray))
+            table[row][col] = tuple(table[row][col])
+    return table
+
+
+# Target squares of knight and king and sliding rays of every square, built once at import
+knight_targets = jump_table(knight_offsets)
+king_targets = jump_table(king_offsets)
+linear_rays = ray_table(linear_steps)
+diagonal_rays = ray_table(diagonal_steps)
+queen_rays = [[linear_rays[row][col] + diagonal_rays[row][col] for col in range(8)] for row in range(8)]
 
 
 class Piece:
     """
-    Piece class objects stores color,position and image.
-    each piece inherits from this class
+    Piece class objects stores color and position, each piece inherits from this class.
+    pieces have no rendering state and use __slots__ instead of a per instance __dict__
     """
+    __slots__ = ('row', 'col', 'color')
 
-    def __init__(self, row, col, color, img):
+    def __init__(self, row, col, color):
         # Position on board and piece color
         self.row = row
         self.col = col
         self.color = color
 
-        # Load image of piece
-        self.img = pygame.image.load(img)
-
-        # Highlight piece when selected
-        self.highlight = False
-
-    def draw(self, screen):
+    @property
+    def img(self):
         """
-        Draw loaded images of pieces at its (row,col) position on board.
-        highlight it with light blue square if piece is selected
+        Name of piece sprite in atlas
         """
-        if self.highlight:
-            pygame.draw.rect(screen, (0, 0, 200),
-                             (self.col * squaresize, self.row * squaresize, squaresize, squaresize), 5)
-
-        screen.blit(self.img, (self.col * squaresize, self.row * squaresize))
+        return piece_images[self.color, type(self)]
 
     def move_locations(self, row, col, board):
         """
@@ -77,72 +109,63 @@ class Piece:
             else:
                 return False
 
-    def valid_moves_linear(self, board):
+    def valid_moves_jump(self, targets, board):
         """
-        Get all possible squares where piece can make linear movements and
-        return list of tuples containing (row,col) coordinates of board
-        where piece can move
+        Return list of (row,col) squares from precomputed targets of piece square that are empty
+        or occupied by opponent piece
         """
-        # Horizontal moves
+        array = board.array
+        color = self.color
         move_list = []
-        new_row = self.row
-
-        for i in (-1, 1):
-            new_col = self.col
-            while True:
-                new_col += i
-                if self.move_locations(new_row, new_col, board):
-                    move_list.append((new_row, new_col))
-                    if self.capture_locations(new_row, new_col, board):
-                        break
-                else:
-                    break
+        for row, col in targets[self.row][self.col]:
+            piece = array[row][col]
+            if piece is None or piece.color != color:
+                move_list.append((row, col))
 
-        # Vertical moves
-        new_col = self.col
-
-        for i in (-1, 1):
-            new_row = self.row
-            while True:
-                new_row += i
-                if self.move_locations(new_row, new_col, board):
-                    move_list.append((new_row, new_col))
-                    if self.capture_locations(new_row, new_col, board):
-                        break
+        return move_list
+
+    def valid_moves_rays(self, rays, board):
+        """
+        Walk precomputed rays of piece square and return list of (row,col) squares piece can slide to,
+        every ray ends at first piece met which is included if it belongs to opponent
+        """
+        array = board.array
+        color = self.color
+        move_list = []
+        for ray in rays[self.row][self.col]:
+            for row, col in ray:
+                piece = array[row][col]
+                if piece is None:
+                    move_list.append((row, col))
                 else:
+                    if piece.color != color:
+                        move_list.append((row, col))
                     break
 
         return move_list
 
+    def valid_moves_linear(self, board):
+        """
+        Get all possible squares where piece can make linear movements and
+        return list of tuples containing (row,col) coordinates of board
+        where piece can move
+        """
+        return self.valid_moves_rays(linear_rays, board)
+
     def valid_moves_diagonal(self, board):
         """
         Get all possible squares where piece can make diagonal movements and
         return list of tuples containing (row,col) coordinates of board
         where piece can move
         """
-        move_list = []
-
-        # Check for all possible diagonal moves
-        increments = [(-1, -1), (1, 1), (1, -1), (-1, 1)]
-        for offset in increments:
-            new_row = self.row
-            new_col = self.col
-            while True:
-                new_row += offset[1]
-                new_col += offset[0]
-                if self.move_locations(new_row, new_col, board):
-                    move_list.append((new_row, new_col))
-                    if self.capture_locations(new_row, new_col, board):
-                        break
-                else:
-                    break
-
-        return move_list
+        return self.valid_moves_rays(diagonal_rays, board)
 
 
 class Pawn(Piece):
-    def __init__(self, row, col, color, img):
-        super().__init__(row, col, color, img)
+    __slots__ = ()
+
+    def __init__(self, row, col, color):
+        super().__init__(row, col, color)
 
     def valid_moves(self, board):
         """
@@ -171,18 +194,21 @@ class Pawn(Piece):
             new_col = self.col + change
             new_row = self.row + increment[color]
 
-            if not self.move_locations(new_row, new_col, board) or not self.capture_locations(new_row, new_col, board):
-                continue
-            else:
+            if self.move_locations(new_row, new_col, board) and self.capture_locations(new_row, new_col, board):
+                move_list.append((new_row, new_col))
+
+            # En passant capture of pawn that just moved two squares past this pawn
+            elif board.en_passant == (new_row, new_col) and new_row == (2 if color == "w" else 5):
                 move_list.append((new_row, new_col))
 
         return move_list
 
 
 class Rook(Piece):
+    __slots__ = ('moved',)
 
-    def __init__(self, row, col, color, img):
-        super().__init__(row, col, color, img)
+    def __init__(self, row, col, color):
+        super().__init__(row, col, color)
 
         # Check if rook is moved to determine castling possibility
         self.moved = False
@@ -195,9 +221,10 @@ class Rook(Piece):
 
 
 class Bishop(Piece):
+    __slots__ = ()
 
-    def __init__(self, row, col, color, img):
-        super().__init__(row, col, color, img)
+    def __init__(self, row, col, color):
+        super().__init__(row, col, color)
 
     def valid_moves(self, board):
         """
@@ -207,33 +234,24 @@ class Bishop(Piece):
 
 
 class Knight(Piece):
+    __slots__ = ()
 
-    def __init__(self, row, col, color, img):
-        super().__init__(row, col, color, img)
+    def __init__(self, row, col, color):
+        super().__init__(row, col, color)
 
     def valid_moves(self, board):
         """
         Generate all possible moves and return list of tuples
         with valid (row,col) coordinates
         """
-        move_list = []
-        offsets = [(-1, -2), (-1, 2), (-2, -1), (-2, 1),
-                   (1, -2), (1, 2), (2, -1), (2, 1)]
-
-        for offset in offsets:
-            new_col = self.col + offset[0]
-            new_row = self.row + offset[1]
-
-            if self.move_locations(new_row, new_col, board):
-                move_list.append((new_row, new_col))
-
-        return move_list
+        return self.valid_moves_jump(knight_targets, board)
 
 
 class King(Piece):
+    __slots__ = ('moved',)
 
-    def __init__(self, row, col, color, img):
-        super().__init__(row, col, color, img)
+    def __init__(self, row, col, color):
+        super().__init__(row, col, color)
 
         # Check if king is moved to determine castling possibility
         self.moved = False
@@ -243,31 +261,25 @@ class King(Piece):
         Generate all possible moves and return list of tuples
         with valid (row,col) coordinates
         """
-        move_list = []
-        offsets = [(1, 1), (-1, -1), (1, -1), (-1, 1),
-                   (0, 1), (1, 0), (-1, 0), (0, -1)]
-
-        for offset in offsets:
-            new_col = self.col + offset[0]
-            new_row = self.row + offset[1]
-
-            if self.move_locations(new_row, new_col, board):
-                move_list.append((new_row, new_col))
-
-        return move_list
+        return self.valid_moves_jump(king_targets, board)
 
 
 class Queen(Piece):
+    __slots__ = ()
 
-    def __init__(self, row, col, color, img):
-        super().__init__(row, col, color, img)
+    def __init__(self, row, col, color):
+        super().__init__(row, col, color)
 
     def valid_moves(self, board):
         """
         Return list of all valid linear and diagonal coordinates where
         piece can move
         """
-        move_list1 = self.valid_moves_diagonal(board)
-        move_list2 = self.valid_moves_linear(board)
+        return self.valid_moves_rays(queen_rays, board)
+
 
-        return list(set(move_list1 + move_list2))
+# Sprite name of each piece type by color
+piece_images = {('b', Pawn): b_pawn, ('b', Knight): b_knight, ('b', Bishop): b_bishop,
+                ('b', Rook): b_rook, ('b', Queen): b_queen, ('b', King): b_king,
+                ('w', Pawn): w_pawn, ('w', Knight): w_knight, ('w', Bishop): w_bishop,
+                ('w', Rook): w_rook, ('w', Queen): w_queen, ('w', King): w_king}
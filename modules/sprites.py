@@ -0,0 +1,58 @@
+import pygame
+
+# All images are packed in one atlas: chessboard on top, white and black pieces in two rows below it
+atlas_path = "assets/sprites.png"
+sprite_rects = {'board': (0, 0, 480, 480)}
+for row, color in enumerate('wb'):
+    for col, name in enumerate(('king', 'queen', 'rook', 'bishop', 'knight', 'pawn')):
+        sprite_rects[color + name] = (col * 60, 480 + row * 60, 60, 60)
+
+# Size of square block in pixels used when no other size is asked for
+default_squaresize = 60
+
+# Atlas surface converted to display format, loaded by load_atlas
+atlas = None
+
+# Scaled surfaces keyed by (sprite name, width, height, alpha), filled on first use
+sprite_cache = {}
+
+
+def load_atlas(path=atlas_path):
+    """
+    Read sprite atlas from disk once and convert it to pixel format of display with per pixel alpha,
+    so blits do not convert pixels every frame. display mode has to be set before
+    """
+    global atlas
+    atlas = pygame.image.load(path).convert_alpha()
+    sprite_cache.clear()
+
+
+def sprite(name, width, height, alpha=True):
+    """
+    Return surface of sprite scaled to width x height. every size is scaled only once and the
+    same surface is returned by later calls. sprites without transparent pixels like the chessboard
+    can drop alpha, which makes blitting them cheaper
+    """
+    key = name, width, height, alpha
+    surface = sprite_cache.get(key)
+    if surface is None:
+        if atlas is None:
+            load_atlas()
+        surface = atlas.subsurface(sprite_rects[name])
+        if surface.get_size() != (width, height):
+            surface = pygame.transform.smoothscale(surface, (width, height))
+        surface = surface.convert_alpha() if alpha else surface.convert()
+        sprite_cache[key] = surface
+    return surface
+
+
+def draw_piece(screen, piece, squaresize=default_squaresize, highlight=False):
+    """
+    Draw image of piece at its (row,col) position on board.
+    highlight it with light blue square if piece is selected
+    """
+    if highlight:
+        pygame.draw.rect(screen, (0, 0, 200),
+                         (piece.col * squaresize, piece.row * squaresize, squaresize, squaresize), 5)
+
+    screen.blit(sprite(piece.img, squaresize, squaresize), (piece.col * squaresize, piece.row * squaresize))
@@ -0,0 +1,409 @@
+import mmap
+import os
+from array import array
+
+from modules.board import *
+from modules.bitboard import king_attacks, knight_attacks, pawn_attacks, rays, slide, linear_directions
+from modules.bitboard import squares as bits
+
+# Endgames the generator can solve as name: pieces of strong side besides king.
+# strong side is always white inside tables, positions with black pieces are probed with colors swapped
+endgames = {'KQK': (Queen,), 'KRK': (Rook,), 'KPK': (Pawn,), 'KBNK': (Bishop, Knight)}
+
+# Directory of generated tables, one <name>.bin file per endgame
+tablebase_dir = "tablebases"
+
+# Largest number of pieces (kings included) of supported endgames
+max_pieces = 4
+
+# Score of won tablebase position, distance to mate in plies is subtracted so faster mates score higher
+tablebase_win = 100000
+
+# Squares around every square, where king can move
+king_squares = [list(bits(king_attacks[square])) for square in range(64)]
+
+
+def line_tables():
+    """
+    Build (lines, between) tables: lines[a][b] is Rook if squares share row or column, Bishop if they share
+    diagonal, otherwise None. between[a][b] is mask of squares strictly between them
+    """
+    lines = [[None] * 64 for square in range(64)]
+    between = [[0] * 64 for square in range(64)]
+    for direction, masks in rays.items():
+        slider = Rook if direction in linear_directions else Bishop
+        for square in range(64):
+            for target in bits(masks[square]):
+                lines[square][target] = slider
+                between[square][target] = masks[square] & ~masks[target] & ~(1 << target)
+    return lines, between
+
+
+def symmetry_tables():
+    """
+    Build list of 8 square maps, one per board symmetry: bit 1 flips rows, bit 2 flips columns and
+    bit 4 swaps rows and columns
+    """
+    transforms = []
+    for symmetry in range(8):
+        squares = []
+        for square in range(64):
+            row, col = divmod(square, 8)
+            if symmetry & 4:
+                row, col = col, row
+            if symmetry & 1:
+                row = 7 - row
+            if symmetry & 2:
+                col = 7 - col
+            squares.append(row * 8 + col)
+        transforms.append(squares)
+    return transforms
+
+
+lines, between = line_tables()
+transforms = symmetry_tables()
+
+
+def attacked(square, squares, types, occupied, skip=-1):
+    """
+    Check if white king or any white piece except the one at index skip attacks square.
+    squares is (white king, black king, pieces ...), occupied is mask of squares blocking sliders
+    """
+    if king_attacks[squares[0]] >> square & 1:
+        return True
+    for i, piece_type in enumerate(types):
+        if i == skip:
+            continue
+        origin = squares[i + 2]
+        if piece_type == Knight:
+            if knight_attacks[origin] >> square & 1:
+                return True
+        elif piece_type == Pawn:
+            if pawn_attacks['w'][origin] >> square & 1:
+                return True
+        else:
+            line = lines[origin][square]
+            if line is not None and (piece_type == Queen or piece_type == line):
+                if not between[origin][square] & occupied:
+                    return True
+    return False
+
+
+class EndgameTable:
+    """
+    EndgameTable maps positions of one endgame to perfect index of packed byte table. white king is moved
+    into a fixed region by board symmetry (10 squares without pawns, 32 with pawns), index is built from
+    squares of white king region, black king and pieces. table holds white to move half followed by
+    black to move half, every byte is distance to mate in plies + 1 for positions won by white, 0 otherwise
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.types = endgames[name]
+        if Pawn in self.types:
+            symmetries = (0, 2)
+            region = [square for square in range(64) if square % 8 <= 3]
+        else:
+            symmetries = range(8)
+            region = [square for square in range(64) if square // 8 <= square % 8 <= 3]
+        self.region = region
+        self.king_index = {square: i for i, square in enumerate(region)}
+        self.size = len(region) * 64 ** (len(self.types) + 1)
+
+        # Symmetries moving white king into region, two for squares on diagonal of region
+        self.candidates = [[transforms[symmetry] for symmetry in symmetries if transforms[symmetry][square] in
+                            self.king_index] for square in range(64)]
+
+    def index(self, squares):
+        """
+        Return index of position given as (white king, black king, pieces ...) squares, position and its mirror
+        images share one index
+        """
+        best = None
+        for transform in self.candidates[squares[0]]:
+            index = self.king_index[transform[squares[0]]]
+            for square in squares[1:]:
+                index = index * 64 + transform[square]
+            if best is None or index < best:
+                best = index
+        return best
+
+    def positions(self):
+        """
+        Yield (index, squares) of every legal position with white king in region and index of its own
+        """
+        count = len(self.types)
+        for king in self.region:
+            for rest in range(64 ** (count + 1)):
+                squares = [king]
+                for i in range(count, -1, -1):
+                    squares.append(rest >> 6 * i & 63)
+                if len(set(squares)) < len(squares) or king_attacks[king] >> squares[1] & 1:
+                    continue
+                if any(piece_type == Pawn and not 8 <= squares[i + 2] < 56 for i, piece_type in
+                       enumerate(self.types)):
+                    continue
+                squares = tuple(squares)
+                index = self.king_index[king] * 64 ** (count + 1) + rest
+                if self.index(squares) == index:
+                    yield index, squares
+
+    def black_moves(self, squares):
+        """
+        Return list of (squares after move, captured piece index or -1) for every legal black king move
+        """
+        types = self.types
+        wk, bk = squares[0], squares[1]
+        moves = []
+        for target in king_squares[bk]:
+            if target == wk or king_attacks[wk] >> target & 1:
+                continue
+            captured = squares.index(target, 2) - 2 if target in squares[2:] else -1
+            occupied = 1 << wk
+            for j, square in enumerate(squares[2:]):
+                if j != captured:
+                    occupied |= 1 << square
+            if attacked(target, squares, types, occupied, captured):
+                continue
+            moves.append(((wk, target) + squares[2:], captured))
+        return moves
+
+    def black_unmoves(self, squares):
+        """
+        Return squares of positions with black to move from which black king could move to this position
+        """
+        wk, bk = squares[0], squares[1]
+        positions = []
+        for origin in king_squares[bk]:
+            if origin in squares or king_attacks[wk] >> origin & 1:
+                continue
+            positions.append((wk, origin) + squares[2:])
+        return positions
+
+    def white_unmoves(self, squares):
+        """
+        Return squares of positions with white to move from which a white move (no capture, no promotion)
+        leads to this position. black king must not be in check in those positions
+        """
+        types = self.types
+        wk, bk = squares[0], squares[1]
+        occupied = 0
+        for square in squares:
+            occupied |= 1 << square
+
+        positions = []
+        for origin in king_squares[wk]:
+            if not occupied >> origin & 1 and not king_attacks[bk] >> origin & 1:
+                position = (origin,) + squares[1:]
+                if not attacked(bk, position, types, occupied & ~(1 << wk) | 1 << origin):
+                    positions.append(position)
+
+        for i, piece_type in enumerate(types):
+            square = squares[i + 2]
+            origins = []
+            if piece_type == Knight:
+                origins = list(bits(knight_attacks[square]))
+            elif piece_type == Pawn:
+                # White pawns move towards row 0, pawn came from row below or two rows below on first move
+                if square + 8 < 56 and not occupied >> square + 8 & 1:
+                    origins.append(square + 8)
+                    if square // 8 == 4 and not occupied >> square + 16 & 1:
+                        origins.append(square + 16)
+            else:
+                for direction in rays:
+                    if piece_type == Queen or (piece_type == Rook) == (direction in linear_directions):
+                        origins.extend(bits(slide(square, direction, occupied) & ~occupied))
+
+            for origin in origins:
+                if occupied >> origin & 1:
+                    continue
+                position = squares[:i + 2] + (origin,) + squares[i + 3:]
+                if not attacked(bk, position, types, occupied & ~(1 << square) | 1 << origin):
+                    positions.append(position)
+
+        return positions
+
+    def white_promotions(self, squares):
+        """
+        Return squares of Queen endgame positions (black to move) reached by pawn promotions
+        """
+        occupied = 0
+        for square in squares:
+            occupied |= 1 << square
+        promotions = []
+        for i, piece_type in enumerate(self.types):
+            square = squares[i + 2]
+            if piece_type == Pawn and square // 8 == 1 and not occupied >> square - 8 & 1:
+                promotions.append(squares[:2] + (square - 8,))
+        return promotions
+
+
+def generate(name, directory=tablebase_dir):
+    """
+    Solve endgame by retrograde analysis and write table to directory, returns table as bytearray.
+    positions with black to move and mated are lost in 0 plies, from there positions are resolved in order
+    of distance to mate: white to move wins if any move reaches lost position, black to move loses
+    once every black move reaches won position. black king capturing a piece or stalemate is a draw.
+    KPK needs KQK table in directory for promotions
+    """
+    table = EndgameTable(name)
+    size = table.size
+    values = bytearray(2 * size)
+
+    # Black to move positions that can not be lost and number of positions reached by black moves
+    # not yet known to be won by white
+    safe = bytearray(size)
+    counts = array('b', bytes(size))
+
+    # Positions by distance to mate in plies, indexes of black to move positions are offset by size
+    buckets = [[]]
+    promotions = {}
+    queen_table = EndgameTable('KQK') if Pawn in table.types else None
+    queen_values = load_table('KQK', directory) if queen_table else None
+
+    for index, squares in table.positions():
+        # Black to move: mate, stalemate or capture
+        moves = table.black_moves(squares)
+        if any(captured >= 0 for position, captured in moves):
+            safe[index] = 1
+        elif not moves:
+            occupied = 1 << squares[0]
+            for square in squares[2:]:
+                occupied |= 1 << square
+            if attacked(squares[1], squares, table.types, occupied):
+                values[size + index] = 1
+                buckets[0].append(size + index)
+            else:
+                safe[index] = 1
+        else:
+            # Symmetric moves reaching same index are undone only once, so distinct indexes are counted
+            counts[index] = len(set(table.index(position) for position, captured in moves))
+
+        # White to move: promotion into won Queen endgame
+        if queen_table is not None:
+            occupied = 0
+            for square in squares:
+                occupied |= 1 << square
+            if attacked(squares[1], squares, table.types, occupied):
+                continue
+            for position in table.white_promotions(squares):
+                value = queen_values[queen_table.size + queen_table.index(position)]
+                if value and promotions.get(index, 256) > value:
+                    promotions[index] = value
+
+    seeds = {}
+    for index, plies in promotions.items():
+        seeds.setdefault(plies, []).append(index)
+
+    plies = 0
+    while plies < len(buckets) or any(key >= plies for key in seeds):
+        if plies == len(buckets):
+            buckets.append([])
+        for index in seeds.get(plies, []):
+            if not values[index]:
+                values[index] = plies + 1
+                buckets[plies].append(index)
+
+        next_bucket = []
+        for index in buckets[plies]:
+            if index < size:
+                # White wins here, black moves into this position from predecessors
+                for position in table.black_unmoves(decode(table, index)):
+                    previous = table.index(position)
+                    if values[size + previous] or safe[previous]:
+                        continue
+                    counts[previous] -= 1
+                    if counts[previous] <= 0 and all(values[table.index(move)] for move, captured in
+                                                     table.black_moves(decode(table, previous))):
+                        values[size + previous] = plies + 2
+                        next_bucket.append(size + previous)
+            else:
+                # Black is lost here, any white move into this position wins
+                for position in table.white_unmoves(decode(table, index - size)):
+                    previous = table.index(position)
+                    if not values[previous]:
+                        values[previous] = plies + 2
+                        next_bucket.append(previous)
+
+        if next_bucket:
+            if plies + 1 == len(buckets):
+                buckets.append([])
+            buckets[plies + 1].extend(next_bucket)
+        plies += 1
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name + '.bin'), 'wb') as file:
+        file.write(values)
+    return values
+
+
+def decode(table, index):
+    """
+    Return squares of position stored at index of table
+    """
+    squares = []
+    for i in range(len(table.types) + 1):
+        squares.append(index & 63)
+        index >>= 6
+    squares.append(table.region[index])
+    return tuple(reversed(squares))
+
+
+def load_table(name, directory=tablebase_dir):
+    """
+    Return memory mapped table of endgame, None if it is not generated
+    """
+    path = os.path.join(directory, name + '.bin')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Tablebase:
+    """
+    Tablebase answers positions of generated endgames from memory mapped tables with exact score
+    """
+
+    def __init__(self, directory=tablebase_dir):
+        self.tables = {}
+        for name in endgames:
+            values = load_table(name, directory)
+            if values is not None:
+                self.tables[name] = EndgameTable(name), values
+
+    def probe(self, board):
+        """
+        Return score of position from point of view of side to move, None if position is not in tablebase.
+        won positions score tablebase_win minus distance to mate in plies, draws score 0
+        """
+        if board.piece_count > max_pieces or not self.tables:
+            return None
+
+        pieces = {'w': [], 'b': []}
+        for line in board.array:
+            for piece in line:
+                if piece is not None:
+                    pieces[piece.color].append(piece)
+        strong = 'w' if len(pieces['b']) == 1 else 'b'
+        if len(pieces['w' if strong == 'b' else 'b']) != 1:
+            return None
+
+        # Table pieces in order of endgame name, kings first
+        order = {King: 0, Queen: 1, Rook: 2, Bishop: 3, Knight: 4, Pawn: 5}
+        strong_pieces = sorted(pieces[strong], key=lambda piece: order[type(piece)])
+        name = ''.join(fen_letters[type(piece)].upper() for piece in strong_pieces) + 'K'
+        if name not in self.tables:
+            return None
+        table, values = self.tables[name]
+
+        # Black strong side is probed with board turned upside down
+        flip = 56 if strong == 'b' else 0
+        weak = pieces['w' if strong == 'b' else 'b'][0]
+        squares = [(piece.row * 8 + piece.col) ^ flip for piece in strong_pieces]
+        squares.insert(1, (weak.row * 8 + weak.col) ^ flip)
+        value = values[(0 if board.turn == strong else table.size) + table.index(tuple(squares))]
+        if not value:
+            return 0
+        score = tablebase_win - (value - 1)
+        return score if board.turn == strong else -score
@@ -0,0 +1,292 @@
+import datetime
+import multiprocessing
+import random
+
+from modules.analysis import *
+from modules.uci import *
+
+# Search options engine configurations can switch on and off
+search_options = ('ordering', 'quiescence', 'null_move', 'reductions')
+
+# Game is adjudicated as won when both engines agree on score of at least win_score for win_plies plies in a row,
+# and as drawn after draw_start plies when scores stay within draw_score for draw_plies plies in a row
+win_score = 1000
+win_plies = 8
+draw_score = 10
+draw_plies = 16
+draw_start = 80
+
+# Game is drawn when it gets this long
+max_plies = 400
+
+# Size of transposition table of every engine in megabytes
+default_hash = 8
+
+# Random moves played from start position when no openings file is given, so deterministic engines
+# do not replay the same game
+default_random_plies = 8
+
+
+def parse_engine(text):
+    """
+    Parse engine configuration like 'new:depth=4,null_move=0' into dict. keys are depth, nodes, time (seconds
+    per move), hash (megabytes) and search options ordering, quiescence, null_move and reductions (1 or 0)
+    """
+    name, _, settings = text.partition(':')
+    engine = {'name': name, 'depth': None, 'nodes': None, 'time': None, 'hash': default_hash, 'options': {}}
+    for setting in settings.split(','):
+        if not setting:
+            continue
+        key, _, value = setting.partition('=')
+        if key in search_options:
+            engine['options'][key] = value not in ('0', 'false', 'off')
+        elif key in ('depth', 'nodes', 'hash'):
+            engine[key] = int(value)
+        elif key == 'time':
+            engine[key] = float(value)
+        else:
+            raise ValueError("unknown engine setting {}".format(key))
+    return engine
+
+
+def read_openings(path):
+    """
+    Read start positions from file with one FEN or EPD line per line, start position is used without file
+    """
+    if path is None:
+        return [start_fen]
+    with open(path) as file:
+        lines = [line.strip() for line in file]
+    return [parse_epd(line)[0] for line in lines if line and not line.startswith('#')]
+
+
+def start_positions(openings, count, random_plies=0, seed=0):
+    """
+    Return up to count different start positions as FEN. without random_plies every opening is used once,
+    otherwise positions are made by playing random_plies random legal moves from openings in turn.
+    fewer positions are returned when no more different ones are found, as engines limited by depth or
+    nodes play the same game again from the same position
+    """
+    generator = random.Random(seed)
+    positions = []
+    seen = set()
+    attempts = count * 20 if random_plies else len(openings)
+    for attempt in range(attempts):
+        if len(positions) >= count:
+            break
+        board = Board(openings[attempt % len(openings)])
+        for ply in range(random_plies):
+            moves = [move for move in generate_moves(board, board.turn) if board.is_legal(*board.decode(move)[:3])]
+            if not moves:
+                break
+            board.make_encoded_move(generator.choice(moves))
+
+        # Positions are told apart without move counters
+        key = ' '.join(board.to_fen().split()[:4])
+        if key not in seen and game_result(board) is None:
+            seen.add(key)
+            positions.append(board.to_fen())
+    return positions
+
+
+def game_result(board):
+    """
+    Return (result, termination) if game has ended in current position, otherwise None
+    """
+    color = board.turn
+    if not board.has_legal_move(color):
+        if board.is_checked(color):
+            return ('0-1' if color == 'w' else '1-0'), "checkmate"
+        return '1/2-1/2', "stalemate"
+    if board.halfmove_clock >= 100:
+        return '1/2-1/2', "fifty move rule"
+    if board.repetitions() >= 2:
+        return '1/2-1/2', "threefold repetition"
+    if board.insufficient_material():
+        return '1/2-1/2', "insufficient material"
+    return None
+
+
+def adjudicate(scores):
+    """
+    Return (result, termination) if game can be decided from scores of last moves from white's point of view
+    """
+    if len(scores) >= win_plies:
+        last = scores[-win_plies:]
+        if all(score >= win_score for score in last):
+            return '1-0', "adjudication"
+        if all(score <= -win_score for score in last):
+            return '0-1', "adjudication"
+    if len(scores) >= max(draw_start, draw_plies) and all(abs(score) <= draw_score for score in scores[-draw_plies:]):
+        return '1/2-1/2', "adjudication"
+    return None
+
+
+def play_game(task):
+    """
+    Run in pool process: play one game from opening FEN between white and black engine configuration.
+    with time control (base seconds, increment seconds) engines share out their clock and lose when it runs out,
+    otherwise every move is searched with limits of the engine. returns game as dict with SAN moves
+    """
+    number, fen, white, black, time_control, adjudication = task
+    board = Board(fen)
+    engines = {'w': white, 'b': black}
+    tables = {color: TranspositionTable(engine['hash']) for color, engine in engines.items()}
+    clocks = {color: time_control[0] for color in engines} if time_control else None
+    game = {'round': number, 'fen': board.to_fen(), 'white': white['name'], 'black': black['name'], 'moves': []}
+    scores = []
+
+    while True:
+        ended = game_result(board)
+        if ended is None and adjudication:
+            ended = adjudicate(scores)
+        if ended is None and len(game['moves']) >= max_plies:
+            ended = '1/2-1/2', "move limit"
+        if ended is not None:
+            break
+
+        color = board.turn
+        engine = engines[color]
+        time_limit = engine['time']
+        if clocks is not None:
+            params = {'wtime': clocks['w'] * 1000, 'btime': clocks['b'] * 1000,
+                      'winc': time_control[1] * 1000, 'binc': time_control[1] * 1000}
+            time_limit = move_time(params, color)
+
+        search = Search(table=tables[color], time_limit=time_limit, node_limit=engine['nodes'], **engine['options'])
+        score, move, depth = iterative_deepening(board, time_limit=time_limit, node_limit=engine['nodes'],
+                                                 max_depth=engine['depth'] or 64, search=search)
+        elapsed = time.perf_counter() - search.start
+
+        if clocks is not None:
+            clocks[color] -= elapsed
+            if clocks[color] < 0:
+                ended = ('0-1' if color == 'w' else '1-0'), "time forfeit"
+                break
+            clocks[color] += time_control[1]
+
+        # Game is not over so side to move has a legal move, 0 would be written and played as null move
+        if not move:
+            raise RuntimeError("engine {} returned no move in {}".format(engine['name'], board.to_fen()))
+        game['moves'].append(board.san(*board.decode(move)))
+        board.make_encoded_move(move)
+        scores.append(score if color == 'w' else -score)
+
+    game['result'], game['termination'] = ended
+    return game
+
+
+def tournament(engines, openings, games, time_control=None, adjudication=True, workers=1):
+    """
+    Play games between two engine configurations and yield every game as soon as it is finished.
+    every opening is played twice with colors swapped and never reused, repeated games would be counted
+    as independent results. use start_positions to get enough different openings
+    """
+    if games > 2 * len(openings):
+        raise ValueError("{} games need {} different openings, got {}".format(games, (games + 1) // 2,
+                                                                            len(openings)))
+    tasks = []
+    for number in range(games):
+        fen = openings[number // 2]
+        first, second = engines if number % 2 == 0 else engines[::-1]
+        tasks.append((number + 1, fen, first, second, time_control, adjudication))
+
+    if workers <= 1:
+        for task in tasks:
+            yield play_game(task)
+        return
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        for game in pool.imap_unordered(play_game, tasks):
+            yield game
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def pgn_text(game, event="Self-play"):
+    """
+    Return game as PGN text, games not starting from start position get SetUp and FEN tags
+    """
+    tags = [('Event', event), ('Site', "?"), ('Date', datetime.date.today().strftime("%Y.%m.%d")),
+            ('Round', game['round']), ('White', game['white']), ('Black', game['black']), ('Result', game['result'])]
+    if game['fen'] != start_fen:
+        tags += [('SetUp', "1"), ('FEN', game['fen'])]
+    tags.append(('Termination', game['termination']))
+
+    # Move numbers continue from move counters of starting position
+    fields = game['fen'].split()
+    number = int(fields[5])
+    white = fields[1] == 'w'
+    tokens = []
+    for move in game['moves']:
+        if white:
+            tokens.append("{}.".format(number))
+        elif not tokens:
+            tokens.append("{}...".format(number))
+        tokens.append(move)
+        if not white:
+            number += 1
+        white = not white
+    tokens.append(game['result'])
+
+    # Movetext lines are kept under 80 characters
+    lines = []
+    line = ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 79:
+            lines.append(line)
+            line = token
+        else:
+            line = line + ' ' + token if line else token
+    lines.append(line)
+
+    return ''.join('[{} "{}"]\n'.format(name, value) for name, value in tags) + '\n' + '\n'.join(lines) + '\n\n'
+
+
+def expected_score(elo):
+    """
+    Return expected score of engine that is elo points stronger
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_difference(wins, draws, losses):
+    """
+    Return (elo difference, 95% error margin) of first engine from game results
+    """
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    if score in (0, 1):
+        return (math.inf if score else -math.inf), math.inf
+    deviation = math.sqrt(((wins + draws / 4) / games - score ** 2) / games)
+
+    def elo(value):
+        value = min(max(value, 1e-6), 1 - 1e-6)
+        return -400 * math.log10(1 / value - 1)
+
+    return elo(score), (elo(score + 1.96 * deviation) - elo(score - 1.96 * deviation)) / 2
+
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    """
+    Return log likelihood ratio of hypothesis that first engine is elo1 stronger against elo0 stronger,
+    normal approximation of trinomial game results. half a game is added to every outcome so variance
+    is defined before all outcomes have occurred
+    """
+    wins, draws, losses = wins + 0.5, draws + 0.5, losses + 0.5
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = ((wins + draws / 4) / games - score ** 2) / games
+    score0 = expected_score(elo0)
+    score1 = expected_score(elo1)
+    return (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+
+def sprt_bounds(alpha, beta):
+    """
+    Return (lower, upper) log likelihood ratio bounds of SPRT with false positive rate alpha and
+    false negative rate beta
+    """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
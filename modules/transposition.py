@@ -0,0 +1,99 @@
+from array import array
+
+# Bound types of stored scores
+EXACT = 0
+LOWER = 1  # score is lower bound, search failed high
+UPPER = 2  # score is upper bound, search failed low
+
+# Bytes used by one entry: key (8), score (8), move (2), depth (1), bound (1)
+entry_size = 20
+
+
+class TranspositionTable:
+    """
+    Fixed size hash table of searched positions. entries are kept in flat typed arrays so the table
+    uses the memory budget given in MB and never grows. every bucket has two slots, first one keeps
+    the deepest search (depth-preferred) and second one is always replaced.
+    moves are stored in 16-bit encoding of encode_move, 0 means no move as no move starts and ends on square 0.
+    """
+
+    def __init__(self, size_mb=16):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """
+        Allocate empty table that fits in size_mb megabytes, number of buckets is a power of two
+        """
+        buckets = 1
+        while buckets * 4 * entry_size <= size_mb * 1024 * 1024:
+            buckets *= 2
+        self.mask = buckets - 1
+        entries = buckets * 2
+        self.keys = array('Q', bytes(8 * entries))
+        self.scores = array('d', bytes(8 * entries))
+        self.moves = array('H', bytes(2 * entries))
+        self.depths = array('b', [-1]) * entries
+        self.bounds = array('B', bytes(entries))
+
+    def clear(self):
+        """
+        Remove all entries
+        """
+        self.depths = array('b', [-1]) * len(self.depths)
+
+    def probe(self, key):
+        """
+        Return (depth, score, bound, move) stored for position key or None if position is not in table
+        """
+        index = (key & self.mask) * 2
+        for slot in (index, index + 1):
+            if self.keys[slot] == key and self.depths[slot] >= 0:
+                return self.depths[slot], self.scores[slot], self.bounds[slot], self.moves[slot]
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        """
+        Save search result of position. replaces depth-preferred slot if new search is at least as deep
+        (or same position), otherwise result goes to always-replace slot
+        """
+        index = (key & self.mask) * 2
+        if depth < self.depths[index] and self.keys[index] != key:
+            index += 1
+        self.keys[index] = key
+        self.depths[index] = depth
+        self.scores[index] = score
+        self.bounds[index] = bound
+        self.moves[index] = move
+
+
+# Moves are packed into 16 bits: bits 0-5 target square and bits 6-11 origin square (row * 8 + col),
+# bits 12-13 index of promotion piece (Knight, Bishop, Rook, Queen), bit 14 promotion flag, bit 15 capture flag.
+# origin and target always differ so 0 means no move
+promotion_flag = 1 << 14
+capture_flag = 1 << 15
+
+
+def encode_move(from_row, from_col, to_row, to_col, promotion=None, capture=False):
+    """
+    Pack move into 16-bit integer, promotion is index of promotion piece or None
+    """
+    move = (from_row * 8 + from_col) << 6 | to_row * 8 + to_col
+    if promotion is not None:
+        move |= promotion_flag | promotion << 12
+    if capture:
+        move |= capture_flag
+    return move
+
+
+def decode_move(move):
+    """
+    Unpack move into (from_row, from_col, to_row, to_col)
+    """
+    return move >> 9 & 7, move >> 6 & 7, move >> 3 & 7, move & 7
+
+
+def move_promotion(move):
+    """
+    Return index of promotion piece of move or None if move is no promotion
+    """
+    return move >> 12 & 3 if move & promotion_flag else None
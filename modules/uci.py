@@ -0,0 +1,216 @@
+import copy
+import os
+import sys
+import threading
+
+from modules.parallel import *
+
+engine_name = "chess-with-AI"
+engine_author = "rajnivp"
+
+# Moves left in game assumed when GUI does not send movestogo
+default_moves_to_go = 30
+
+
+def score_text(score, pv):
+    """
+    Return score from point of view of side to move as UCI 'cp x' or 'mate n', moves to mate are counted
+    by mate_moves
+    """
+    mate = mate_moves(score, pv)
+    if mate is not None:
+        return "mate {}".format(mate)
+    return "cp {}".format(int(score))
+
+
+def move_time(params, color):
+    """
+    Return seconds to spend on move from parameters of go command or None if search is not limited by time.
+    with clock times a share of remaining time plus most of increment is used, never more than half of clock
+    """
+    if 'movetime' in params:
+        return params['movetime'] / 1000
+    remaining = params.get('wtime' if color == 'w' else 'btime')
+    if remaining is None:
+        return None
+    increment = params.get('winc' if color == 'w' else 'binc', 0)
+    moves = params.get('movestogo', default_moves_to_go)
+    budget = min(remaining / 2, remaining / max(moves, 1) + increment * 0.8)
+    return max(budget, 10) / 1000
+
+
+class UCIEngine:
+    """
+    UCIEngine talks Universal Chess Interface over stdin/stdout so engine can be used headless by
+    GUIs and tournament managers. search runs in background thread so stop and isready are answered
+    while searching, info line is sent after every completed depth
+    """
+
+    def __init__(self, input=sys.stdin, output=sys.stdout):
+        self.input = input
+        self.output = output
+        self.lock = threading.Lock()
+        self.board = Board()
+        self.threads = 1
+        self.parallel = None
+        self.search = None
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def send(self, text):
+        """
+        Write one line to GUI, lines from search thread and main thread are never mixed
+        """
+        with self.lock:
+            self.output.write(text + '\n')
+            self.output.flush()
+
+    def run(self):
+        """
+        Read commands until quit or end of input
+        """
+        for line in iter(self.input.readline, ''):
+            tokens = line.split()
+            if not tokens:
+                continue
+            if not self.command(tokens[0], tokens[1:]):
+                break
+        self.stop()
+        if self.parallel is not None:
+            self.parallel.close()
+
+    def command(self, name, args):
+        """
+        Handle one command, returns False on quit. unknown commands are ignored as protocol asks
+        """
+        if name == 'uci':
+            self.send("id name {}".format(engine_name))
+            self.send("id author {}".format(engine_author))
+            self.send("option name Hash type spin default 16 min 1 max 4096")
+            self.send("option name Threads type spin default 1 min 1 max {}".format(os.cpu_count() or 1))
+            self.send("uciok")
+        elif name == 'isready':
+            self.send("readyok")
+        elif name == 'ucinewgame':
+            self.stop()
+            transposition_table.clear()
+        elif name == 'setoption':
+            self.stop()
+            self.set_option(args)
+        elif name == 'position':
+            self.stop()
+            self.set_position(args)
+        elif name == 'go':
+            self.stop()
+            self.go(args)
+        elif name == 'stop':
+            self.stop()
+        elif name == 'quit':
+            return False
+        return True
+
+    def set_option(self, args):
+        """
+        Handle 'setoption name <name> value <value>'. Hash is size of transposition table in megabytes,
+        Threads above 1 searches root moves with process pool
+        """
+        if 'name' not in args or 'value' not in args:
+            return
+        name = ' '.join(args[args.index('name') + 1:args.index('value')]).lower()
+        value = ' '.join(args[args.index('value') + 1:])
+        if name == 'hash':
+            transposition_table.resize(max(1, int(value)))
+        elif name == 'threads':
+            self.threads = max(1, int(value))
+            if self.parallel is not None:
+                self.parallel.close()
+                self.parallel = None
+
+    def set_position(self, args):
+        """
+        Handle 'position startpos|fen <fen> [moves <move> ...]'. moves after an illegal move are ignored
+        and invalid FEN leaves start position, both are reported with info string
+        """
+        moves = []
+        if 'moves' in args:
+            moves = args[args.index('moves') + 1:]
+            args = args[:args.index('moves')]
+        self.board = Board()
+        if args and args[0] == 'fen':
+            try:
+                self.board = Board(' '.join(args[1:]))
+            except (ValueError, KeyError, IndexError) as error:
+                self.send("info string invalid position: {}".format(error))
+                return
+        try:
+            self.board.play(moves)
+        except ValueError as error:
+            self.send("info string {}".format(error))
+
+    def go(self, args):
+        """
+        Handle 'go' with depth, nodes, movetime, wtime/btime/winc/binc/movestogo or infinite and
+        start searching current position
+        """
+        params = {}
+        for index, token in enumerate(args[:-1]):
+            if token in ('depth', 'nodes', 'movetime', 'wtime', 'btime', 'winc', 'binc', 'movestogo'):
+                params[token] = int(args[index + 1])
+        infinite = 'infinite' in args
+        time_limit = None if infinite else move_time(params, self.board.turn)
+        max_depth = params.get('depth', 64)
+
+        self.stopped.clear()
+        board = copy.deepcopy(self.board)
+        if self.threads > 1:
+            if self.parallel is None:
+                self.parallel = ParallelSearch(self.threads)
+            self.parallel.reset()
+            self.search = None
+        else:
+            self.search = Search(time_limit=time_limit, node_limit=params.get('nodes'))
+        self.thread = threading.Thread(target=self.think, args=(board, time_limit, max_depth, infinite),
+                                       daemon=True)
+        self.thread.start()
+
+    def think(self, board, time_limit, max_depth, infinite):
+        """
+        Run in search thread: search board and send best move. infinite search waits for stop before
+        sending best move even if search ended by itself
+        """
+        if self.search is None:
+            result = self.parallel.search(board, max_depth, time_limit, report=self.info)
+        else:
+            result = iterative_deepening(board, time_limit=time_limit, max_depth=max_depth, search=self.search,
+                                         report=self.info)
+        if infinite:
+            self.stopped.wait()
+
+        move = result[1] if result else 0
+        if not move:
+            # Search stopped before depth 1 finished, play any legal move
+            moves = [move for move in generate_moves(board, board.turn) if board.is_legal(*board.decode(move)[:3])]
+            move = moves[0] if moves else 0
+        self.send("bestmove {}".format(move_name(*board.decode(move)) if move else "0000"))
+
+    def info(self, depth, score, nodes, seconds, pv):
+        """
+        Send info line of completed depth
+        """
+        self.send("info depth {} score {} nodes {} nps {} time {} pv {}".format(
+            depth, score_text(score, pv), nodes, int(nodes / seconds) if seconds > 0 else 0,
+            int(seconds * 1000), ' '.join(pv)))
+
+    def stop(self):
+        """
+        Stop running search and wait until its best move is sent
+        """
+        self.stopped.set()
+        if self.thread is None:
+            return
+        if self.search is not None:
+            self.search.stop()
+        if self.parallel is not None:
+            self.parallel.stop()
+        self.thread.join()
+        self.thread = None
@@ -0,0 +1,63 @@
+import copy
+import threading
+
+from modules.AI import *
+
+
+class SearchWorker:
+    """
+    SearchWorker runs iterative deepening on a copy of board in a background thread, so the board
+    used for drawing is never touched by search. result is polled from main loop without blocking
+    and search can be cancelled at any time.
+    """
+
+    def __init__(self, board, time_limit=None, node_limit=None, max_depth=64):
+        self.board = copy.deepcopy(board)
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_depth = max_depth
+        self.search = None
+        self.result = None
+        self.pv = []
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        """
+        Start search, time limit is counted from here
+        """
+        self.search = Search(time_limit=self.time_limit, node_limit=self.node_limit)
+        self.thread.start()
+
+    def run(self):
+        """
+        Search position for side to move and store result as (score, move, depth) with move encoded like
+        generate_moves. score is from point of view of side to move, move is 0 if side to move has no move.
+        principal variation of last completed depth is stored as pv in coordinate notation
+        """
+        self.result = iterative_deepening(self.board, max_depth=self.max_depth, search=self.search)
+        if self.result is not None:
+            self.pv = principal_variation_names(self.board, self.search.table, self.result[2])
+
+    def set_time_limit(self, time_limit):
+        """
+        Limit running search to time_limit seconds counted from its start, used when pondering search
+        becomes the real one. search that already ran longer stops as soon as current depth is given up
+        """
+        self.time_limit = time_limit
+        self.search.deadline = self.search.start + time_limit
+
+    def poll(self):
+        """
+        Return result if search has finished, otherwise None
+        """
+        if self.thread.is_alive():
+            return None
+        return self.result
+
+    def cancel(self):
+        """
+        Abort search right away and wait for thread to end
+        """
+        if self.search is not None:
+            self.search.stop()
+            self.thread.join()
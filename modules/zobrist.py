@@ -0,0 +1,19 @@
+import random
+
+from modules.piece import *
+
+# Fixed seed so every process (and every saved table) agrees on the keys
+generator = random.Random(20201)
+
+# One random 64 bit key per piece type, color and square (square index is row * 8 + col)
+piece_keys = {(color, piece_type): [generator.getrandbits(64) for square in range(64)]
+              for color in ('w', 'b') for piece_type in (Pawn, Knight, Bishop, Rook, Queen, King)}
+
+# One key per combination of castling rights, see Board.castle_rights for bit layout
+castle_keys = [generator.getrandbits(64) for rights in range(16)]
+
+# Xored in when black is to move
+side_key = generator.getrandbits(64)
+
+# One key per column of en passant square, xored in while en passant capture is possible
+en_passant_keys = [generator.getrandbits(64) for col in range(8)]
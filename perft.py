@@ -0,0 +1,67 @@
+import argparse
+import sys
+import time
+from modules.perft import *
+from modules.bitboard import BitBoard
+
+
+def run_perft(board, depth):
+    """
+    Print leaf node count, time and nodes/sec for every depth up to given depth
+    """
+    for current in range(1, depth + 1):
+        start = time.perf_counter()
+        nodes = perft(board, current)
+        elapsed = time.perf_counter() - start
+        print("depth {:>2}  nodes {:>10}  {:>8.3f}s  {:>10.0f} nodes/sec".format(
+            current, nodes, elapsed, nodes / elapsed if elapsed else 0))
+
+
+def run_divide(board, depth):
+    """
+    Print leaf node count below every root move
+    """
+    total = 0
+    for move, nodes in divide(board, depth):
+        print("{} {}".format(move, nodes))
+        total += nodes
+    print("total {}".format(total))
+
+
+def run_suite(backend, depth):
+    """
+    Run reference positions up to given depth and compare with expected counts.
+    returns number of mismatches
+    """
+    failures = 0
+    for name, fen, counts in reference_positions:
+        for current, expected in enumerate(counts[:depth], 1):
+            board = backend(fen)
+            start = time.perf_counter()
+            nodes = perft(board, current)
+            elapsed = time.perf_counter() - start
+            status = "ok" if nodes == expected else "FAIL expected {}".format(expected)
+            if nodes != expected:
+                failures += 1
+            print("{:<10} depth {:>2}  nodes {:>10}  {:>8.3f}s  {:>10.0f} nodes/sec  {}".format(
+                name, current, nodes, elapsed, nodes / elapsed if elapsed else 0, status))
+
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Count move generator leaf nodes (perft) headless")
+    parser.add_argument('depth', type=int, nargs='?', default=3, help="perft depth")
+    parser.add_argument('--fen', help="position to count from, start position by default")
+    parser.add_argument('--divide', action='store_true', help="print node count below every root move")
+    parser.add_argument('--suite', action='store_true', help="check reference positions up to depth")
+    parser.add_argument('--bitboard', action='store_true', help="use bitboard backend")
+    args = parser.parse_args()
+
+    backend = BitBoard if args.bitboard else Board
+    if args.suite:
+        sys.exit(1 if run_suite(backend, args.depth) else 0)
+    elif args.divide:
+        run_divide(backend(args.fen), args.depth)
+    else:
+        run_perft(backend(args.fen), args.depth)
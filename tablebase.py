@@ -0,0 +1,58 @@
+import argparse
+import time
+from modules.AI import *
+
+
+def run_generate(names, directory):
+    """
+    Generate tables of given endgames and print won positions, longest mate and time
+    """
+    # Pawn endgame needs Queen table for promotions
+    if 'KPK' in names and 'KQK' not in names and load_table('KQK', directory) is None:
+        names = ['KQK'] + names
+    names = sorted(names, key=lambda name: name != 'KQK')
+
+    for name in names:
+        start = time.perf_counter()
+        values = generate(name, directory)
+        size = EndgameTable(name).size
+        print("{:<5} white to move wins {:>8}  black to move loses {:>8}  longest mate {:>3} plies  "
+              "{} bytes  {:.1f}s".format(name, sum(1 for value in values[:size] if value),
+                                         sum(1 for value in values[size:] if value), max(values) - 1,
+                                         len(values), time.perf_counter() - start))
+
+
+def run_probe(fen, directory):
+    """
+    Print tablebase score of position and score of every legal move
+    """
+    board = Board(fen)
+    tablebase = Tablebase(directory)
+    score = tablebase.probe(board)
+    if score is None:
+        print("position not in tablebase")
+        return
+    print("score {}".format(score))
+
+    color = board.turn
+    for move in generate_moves(board, color):
+        name = move_name(*board.decode(move))
+        board.make_encoded_move(move)
+        if not board.is_checked(color):
+            score = tablebase.probe(board)
+            print("{} {}".format(name, 0 if score is None else -score))
+        board.unmake_move()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate and probe endgame tablebases")
+    parser.add_argument('endgames', nargs='*', default=list(endgames), help="endgames to generate: {}".format(
+        ', '.join(endgames)))
+    parser.add_argument('--dir', default=tablebase_dir, help="directory of table files")
+    parser.add_argument('--probe', metavar='FEN', help="print score of position instead of generating tables")
+    args = parser.parse_args()
+
+    if args.probe:
+        run_probe(args.probe, args.dir)
+    else:
+        run_generate(args.endgames, args.dir)
@@ -0,0 +1,96 @@
+import argparse
+from modules.tournament import *
+
+
+def run_tournament(engines, openings, games, pgn, time_control, adjudication, workers, sprt):
+    """
+    Play match, append every finished game to PGN file and print running score, elo difference and
+    SPRT log likelihood ratio. match stops early once SPRT accepts or rejects the first engine
+    """
+    wins = draws = losses = 0
+    bounds = sprt_bounds(sprt[2], sprt[3]) if sprt else None
+    start = time.perf_counter()
+
+    with open(pgn, 'a') as output:
+        for game in tournament(engines, openings, games, time_control, adjudication, workers):
+            output.write(pgn_text(game))
+            output.flush()
+
+            # Score is counted for first engine
+            if game['result'] == '1/2-1/2':
+                draws += 1
+            elif (game['result'] == '1-0') == (game['white'] == engines[0]['name']):
+                wins += 1
+            else:
+                losses += 1
+
+            played = wins + draws + losses
+            elo, margin = elo_difference(wins, draws, losses)
+            line = "game {:>4}/{}  {} - {} {} ({}, {} moves)  +{} ={} -{}  elo {:+.1f} +/- {:.1f}".format(
+                played, games, game['white'], game['black'], game['result'], game['termination'],
+                (len(game['moves']) + 1) // 2, wins, draws, losses, elo, margin)
+            if sprt:
+                llr = sprt_llr(wins, draws, losses, sprt[0], sprt[1])
+                line += "  llr {:.2f} [{:.2f}, {:.2f}]".format(llr, *bounds)
+            print(line)
+
+            if sprt and not bounds[0] < llr < bounds[1]:
+                print("SPRT: {} is {} after {} games".format(
+                    engines[0]['name'], "stronger (H1 accepted)" if llr >= bounds[1] else
+                    "not stronger (H0 accepted)", played))
+                break
+
+    print("{} games in {:.1f}s, PGN written to {}".format(wins + draws + losses, time.perf_counter() - start, pgn))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Play engine against engine matches headless between two "
+                                                 "configurations")
+    parser.add_argument('engines', nargs=2, metavar='ENGINE',
+                        help="engine as name:setting=value,... with settings depth, nodes, time (seconds per move), "
+                             "hash and {} (0 or 1), like new:depth=3 base:depth=3,null_move=0".format(
+                                 ', '.join(search_options)))
+    parser.add_argument('--openings', help="file with one FEN or EPD start position per line, every position is "
+                                           "played with both colors")
+    parser.add_argument('--games', type=int, default=100, help="maximum number of games, every start position is "
+                                                                 "played once with each color")
+    parser.add_argument('--random-plies', type=int,
+                        help="random moves played from openings to get different start positions ({} without "
+                             "--openings, 0 with it)".format(default_random_plies))
+    parser.add_argument('--seed', type=int, default=1, help="seed of random opening moves")
+    parser.add_argument('--tc', help="time control as base+increment in seconds like 10+0.1, "
+                                     "engines lose when their clock runs out")
+    parser.add_argument('--sprt', type=float, nargs=2, metavar=('ELO0', 'ELO1'),
+                        help="stop when SPRT decides whether first engine is ELO1 rather than ELO0 stronger")
+    parser.add_argument('--alpha', type=float, default=0.05, help="SPRT false positive rate")
+    parser.add_argument('--beta', type=float, default=0.05, help="SPRT false negative rate")
+    parser.add_argument('--no-adjudication', action='store_true', help="play every game until it ends by rules")
+    parser.add_argument('--workers', type=int, default=1, help="number of games played at the same time")
+    parser.add_argument('--pgn', default="tournament.pgn", help="PGN file games are appended to")
+    args = parser.parse_args()
+
+    engines = [parse_engine(text) for text in args.engines]
+    if engines[0]['name'] == engines[1]['name']:
+        parser.error("engines need different names")
+    time_control = None
+    if args.tc:
+        base, _, increment = args.tc.partition('+')
+        time_control = float(base), float(increment or 0)
+    for engine in engines:
+        if time_control is None and not (engine['depth'] or engine['nodes'] or engine['time']):
+            parser.error("engine {} needs depth, nodes or time when no --tc is given".format(engine['name']))
+
+    # Same position played again gives the same game with deterministic engines, so every start position is
+    # used only once per color and games are capped by number of different positions
+    random_plies = args.random_plies
+    if random_plies is None:
+        random_plies = 0 if args.openings else default_random_plies
+    if args.sprt and not args.openings and not random_plies:
+        parser.error("SPRT needs different start positions, give --openings or --random-plies")
+    openings = start_positions(read_openings(args.openings), (args.games + 1) // 2, random_plies, args.seed)
+    games = min(args.games, 2 * len(openings))
+    if games < args.games:
+        print("only {} different start positions, playing {} games".format(len(openings), games))
+
+    sprt = tuple(args.sprt) + (args.alpha, args.beta) if args.sprt else None
+    run_tournament(engines, openings, games, args.pgn, time_control, not args.no_adjudication, args.workers, sprt)
@@ -0,0 +1,5 @@
+from modules.uci import *
+
+
+if __name__ == '__main__':
+    UCIEngine().run()